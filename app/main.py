@@ -4,14 +4,18 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.routes import health, insurance_quotes
 from app.services.vector_databases.vehicle_rates_chroma import initialize_vehicle_rates_chromadb
+from app.services.vehicle_search.vehicle_spec_orchestrator import get_orchestrator
+from app.utils.data_loader import DataLoader
 
 
 app = FastAPI(
     title="Insurance Quotes API",
     description="Provides insurance quotes for a given insurance policy information for a given insurance carriers",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
 )
 # Configure CORS
 origins = [
@@ -34,6 +38,8 @@ app.include_router(health.router, prefix=API_PREFIX,tags=["Auto Insurance Quote
 app.include_router(insurance_quotes.router, prefix=API_PREFIX, tags=["Insurance Quotes"])
 
 initialize_vehicle_rates_chromadb()
+get_orchestrator()
+DataLoader().warmup()
 
 
 @app.get("/insurance-quotes")
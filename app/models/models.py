@@ -75,6 +75,7 @@ class ComprehensiveVehicleSearchRequest(BaseModel):
     year: Optional[int] = None
     additional_info: Optional[str] = None
     conversation_history: Optional[List[Dict[str, str]]] = None
+    include_step_details: Optional[bool] = None  # None -> INCLUDE_VEHICLE_STEP_DETAILS env default
 
 def get_default_coverages() -> Coverages:
     """
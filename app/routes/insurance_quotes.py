@@ -10,7 +10,7 @@ from pydantic import BaseModel, Field
 from app.models.models import ComprehensiveVehicleSearchRequest, RatingInput  # type: ignore
 from app.services.calculations.pricing_orchestrator import PricingOrchestrator
 from app.services.lookup_services.vehicle_lookup_service import VehicleLookupService
-from app.services.vehicle_search.vehicle_spec_orchestrator import VehicleSpecOrchestrator
+from app.services.vehicle_search.vehicle_spec_orchestrator import get_orchestrator
 from app.routes.adapter_service import AdapterService
 from app.services.calculations.home.home_insurance import calculate_home_insurance, get_deductible_factor
 from app.services.calculations.home.cdi_lookup import CDILookupService
@@ -99,11 +99,8 @@ def vehicle_spec_orchestrator(request: ComprehensiveVehicleSearchRequest):
     5. Return detailed step-by-step results
     """
     try:
-        # Import the VehicleSpecOrchestrator
-
-        
-        # Initialize the orchestrator
-        orchestrator = VehicleSpecOrchestrator()
+        # Shared orchestrator (initialized at startup)
+        orchestrator = get_orchestrator()
         
         start_time = time.time()
         # Process the vehicle specification request
@@ -113,7 +110,8 @@ def vehicle_spec_orchestrator(request: ComprehensiveVehicleSearchRequest):
             model=request.model,
             year=request.year,
             additional_info=request.additional_info,
-            conversation_history=request.conversation_history
+            conversation_history=request.conversation_history,
+            include_step_details=request.include_step_details
         )
         duration = time.time() - start_time
         logger.info(f"API /vehicle-spec-orchestrator/ took {duration:.4f} seconds")
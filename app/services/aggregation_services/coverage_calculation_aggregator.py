@@ -1,4 +1,5 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List
 from app.models.models import RatingInput, Vehicle, Usage, Coverages
 from app.services.lookup_services.base_rate_lookup_service import BaseRateLookupService
@@ -22,11 +23,16 @@ class CoverageCalculationAggregator:
         self.driver_adjustment_aggregator = DriverAdjustmentAggregator(carrier_config)
         
     def initialize(self):
-        """Initializes all underlying services."""
-        self.base_rate_service.initialize()
-        self.vehicle_factor_service.initialize()
-        self.coverage_factor_service.initialize()
-        self.driver_adjustment_aggregator.initialize()
+        """Initializes all underlying services concurrently (their table loads are independent and I/O-bound)."""
+        services = [
+            self.base_rate_service,
+            self.vehicle_factor_service,
+            self.coverage_factor_service,
+            self.driver_adjustment_aggregator,
+        ]
+        with ThreadPoolExecutor(max_workers=len(services)) as executor:
+            # list() re-raises the first initialization error, as the sequential calls did
+            list(executor.map(lambda service: service.initialize(), services))
         logger.info("CoverageCalculationAggregator initialized")
         
     def calculate_coverage_premiums(self, rating_input: RatingInput) -> Dict:
@@ -19,7 +19,7 @@ def _load_full() -> dict[str, dict]:
     if _zip_info_map is None:
         _zip_map = {}
         _zip_info_map = {}
-        for doc in StorageService().find({}, "home_ca_zip_locations"):
+        for doc in StorageService.instance().find({}, "home_ca_zip_locations"):
             if doc.get("cdi_location"):
                 zip_str = str(doc["zip"]).zfill(5)
                 _zip_map[zip_str] = doc["cdi_location"]
@@ -111,7 +111,7 @@ class HomeInsuranceCalculator:
 
     def _load(self):
         self._county_factors = (
-            StorageService()
+            StorageService.instance()
             .get_collection_as_dataframe("home_county_factors")
             .set_index("county")
         )
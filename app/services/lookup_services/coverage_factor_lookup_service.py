@@ -21,8 +21,8 @@ class CoverageFactorLookupService:
         self.pd_limits: pd.DataFrame = None
         self.um_limits: pd.DataFrame = None
         self.mpc_limits: pd.DataFrame = None
-        self.drg_deductible_factors: pd.DataFrame = None
-        self.grg_deductible_factors: pd.DataFrame = None
+        self.drg_deductible_factors: Dict[int, Dict] = None
+        self.grg_deductible_factors: Dict[int, Dict] = None
         
     def initialize(self):
         """Loads all coverage factor data tables."""
@@ -30,8 +30,8 @@ class CoverageFactorLookupService:
         self.pd_limits = self.data_loader.load_pd_limits()
         self.um_limits = self.data_loader.load_um_limits()
         self.mpc_limits = self.data_loader.load_mpc_limits()
-        self.drg_deductible_factors = self.data_loader.load_drg_deductible_factors()
-        self.grg_deductible_factors = self.data_loader.load_grg_deductible_factors()
+        self.drg_deductible_factors = self.data_loader.load_drg_deductible_factors_dict()
+        self.grg_deductible_factors = self.data_loader.load_grg_deductible_factors_dict()
         
         logger.info("CoverageFactorLookupService initialized")
         
@@ -198,7 +198,7 @@ class CoverageFactorLookupService:
             self.initialize()
             
         try:
-            factor = self.drg_deductible_factors.loc[drg, deductible]
+            factor = self.drg_deductible_factors[drg][deductible]
             logger.info(f"Collision factor for deductible {deductible} at DRG {drg}: {factor}")
             return float(factor)
         except (KeyError, IndexError):
@@ -211,7 +211,7 @@ class CoverageFactorLookupService:
             self.initialize()
             
         try:
-            factor = self.grg_deductible_factors.loc[grg, deductible]
+            factor = self.grg_deductible_factors[grg][deductible]
             logger.info(f"Comprehensive factor for deductible {deductible} at GRG {grg}: {factor}")
             return float(factor)
         except (KeyError, IndexError):
@@ -16,26 +16,26 @@ class DiscountLookupService:
         self.carrier_config = carrier_config
         self.data_loader = DataLoader()
         
-        # Discount tables
-        self.good_driver_discount: pd.DataFrame = None
-        self.good_student_discount: pd.DataFrame = None
-        self.inexperienced_driver_discount: pd.DataFrame = None
-        self.mature_driver_discount: pd.DataFrame = None
-        self.multi_line_discount: pd.DataFrame = None
-        self.student_away_discount: pd.DataFrame = None
-        self.loyalty_discount: pd.DataFrame = None
-        self.car_safety_discount: pd.DataFrame = None
+        # Discount tables as {index key: row} dicts
+        self.good_driver_discount: Dict[str, Dict] = None
+        self.good_student_discount: Dict[str, Dict] = None
+        self.inexperienced_driver_discount: Dict[str, Dict] = None
+        self.mature_driver_discount: Dict[str, Dict] = None
+        self.multi_line_discount: Dict[str, Dict] = None
+        self.student_away_discount: Dict[str, Dict] = None
+        self.loyalty_discount: Dict[str, Dict] = None
+        self.car_safety_discount: Dict[str, Dict] = None
         
     def initialize(self):
         """Loads all discount data tables."""
-        self.good_driver_discount = self.data_loader.load_good_driver_discount()
-        self.good_student_discount = self.data_loader.load_good_student_discount()
-        self.inexperienced_driver_discount = self.data_loader.load_inexperienced_driver_education_discount()
-        self.mature_driver_discount = self.data_loader.load_mature_driver_course_discount()
-        self.multi_line_discount = self.data_loader.load_multi_line_discount()
-        self.student_away_discount = self.data_loader.load_student_away_discount()
-        self.loyalty_discount = self.data_loader.load_loyalty_discount()
-        self.car_safety_discount = self.data_loader.load_car_safety_rating_discount()
+        self.good_driver_discount = self.data_loader.load_good_driver_discount_dict()
+        self.good_student_discount = self.data_loader.load_good_student_discount_dict()
+        self.inexperienced_driver_discount = self.data_loader.load_inexperienced_driver_education_discount_dict()
+        self.mature_driver_discount = self.data_loader.load_mature_driver_course_discount_dict()
+        self.multi_line_discount = self.data_loader.load_multi_line_discount_dict()
+        self.student_away_discount = self.data_loader.load_student_away_discount_dict()
+        self.loyalty_discount = self.data_loader.load_loyalty_discount_dict()
+        self.car_safety_discount = self.data_loader.load_car_safety_rating_discount_dict()
         
         logger.info("DiscountLookupService initialized")
         
@@ -45,7 +45,7 @@ class DiscountLookupService:
             self.initialize()
             
         try:
-            factor = self.good_driver_discount.loc['yes', 'factor']
+            factor = self.good_driver_discount['yes']['factor']
             discount_factor = 1 - float(factor)  # Convert discount to factor
             logger.info(f"Good driver discount factor for {coverage}: {discount_factor}")
             return discount_factor
@@ -59,7 +59,7 @@ class DiscountLookupService:
             self.initialize()
             
         try:
-            discount_pct = self.good_student_discount.loc['yes', 'discount']
+            discount_pct = self.good_student_discount['yes']['discount']
             if isinstance(discount_pct, str) and '%' in discount_pct:
                 discount_value = float(discount_pct.rstrip('%')) / 100
                 discount_factor = 1 - discount_value
@@ -77,7 +77,7 @@ class DiscountLookupService:
             self.initialize()
             
         try:
-            factor = self.inexperienced_driver_discount.loc[coverage, 'discount_factor']
+            factor = self.inexperienced_driver_discount[coverage]['discount_factor']
             logger.info(f"Inexperienced driver discount factor for {coverage}: {factor}")
             return float(factor)
         except (KeyError, IndexError):
@@ -90,7 +90,7 @@ class DiscountLookupService:
             self.initialize()
             
         try:
-            factor = self.mature_driver_discount.loc['yes', 'factor']
+            factor = self.mature_driver_discount['yes']['factor']
             discount_factor = 1 - float(factor)
             logger.info(f"Mature driver discount factor for {coverage}: {discount_factor}")
             return discount_factor
@@ -104,7 +104,7 @@ class DiscountLookupService:
             self.initialize()
             
         try:
-            factor = self.student_away_discount.loc[coverage, 'discount_factor']
+            factor = self.student_away_discount[coverage]['discount_factor']
             logger.info(f"Student away discount factor for {coverage}: {factor}")
             return float(factor)
         except (KeyError, IndexError):
@@ -117,7 +117,7 @@ class DiscountLookupService:
             self.initialize()
             
         try:
-            discount_value = self.multi_line_discount.loc[multi_line_type, 'discount']
+            discount_value = self.multi_line_discount[multi_line_type]['discount']
             discount_factor = 1 - float(discount_value)
             logger.info(f"Multi-line discount factor for {coverage}: {discount_factor}")
             return discount_factor
@@ -137,18 +137,18 @@ class DiscountLookupService:
             # Find the appropriate loyalty tier
             loyalty_key = f"{loyalty_years} Years"
             coverage_col = f"{coverage.lower()}_factor"
-            factor = self.loyalty_discount.loc[loyalty_key, coverage_col]
+            factor = self.loyalty_discount[loyalty_key][coverage_col]
             discount_factor = 1 - float(factor)
             logger.info(f"Loyalty discount factor for {coverage} at {loyalty_years} years: {discount_factor}")
             return discount_factor
         except (KeyError, IndexError):
             # Try fallback to highest available tier
             try:
-                max_years = max([int(idx.split()[0]) for idx in self.loyalty_discount.index if 'Years' in idx])
+                max_years = max([int(idx.split()[0]) for idx in self.loyalty_discount if 'Years' in idx])
                 if loyalty_years >= max_years:
                     fallback_key = f"{max_years} Years"
                     coverage_col = f"{coverage.lower()}_factor"
-                    factor = self.loyalty_discount.loc[fallback_key, coverage_col]
+                    factor = self.loyalty_discount[fallback_key][coverage_col]
                     discount_factor = 1 - float(factor)
                     logger.info(f"Loyalty discount fallback factor for {coverage}: {discount_factor}")
                     return discount_factor
@@ -164,7 +164,7 @@ class DiscountLookupService:
             self.initialize()
             
         try:
-            discount_value = self.car_safety_discount.loc[safety_rating, 'discount']
+            discount_value = self.car_safety_discount[safety_rating]['discount']
             discount_factor = 1 - float(discount_value)
             logger.info(f"Car safety discount factor for {coverage}: {discount_factor}")
             return discount_factor
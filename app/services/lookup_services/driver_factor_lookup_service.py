@@ -1,5 +1,6 @@
 import pandas as pd
 import logging
+from bisect import bisect_right
 from typing import Dict, List, Optional
 from app.utils.data_loader import DataLoader
 from app.models.models import Driver, Usage, Discounts
@@ -8,6 +9,8 @@ from app.models.models import SpecialFactors
 from app.models.models import Usage
 from app.models.models import Driver
 BASE_DRIVER_FACTOR_COLLECTION="base-driver-factors"
+# Only the factor is read from matched base driver factor documents
+BASE_DRIVER_FACTOR_PROJECTION = {"Factor": 1, "_id": 0}
 
 logger = logging.getLogger(__name__)
 
@@ -155,6 +158,8 @@ ANNUAL_MILEAGE_FACTOR_LOOKUP = {
     31450: {'BIPD': 1.263, 'COLL': 1.271, 'COMP': 1.342, 'MPC': 1.160, 'U': 1.210},
     33950: {'BIPD': 1.355, 'COLL': 1.322, 'COMP': 1.362, 'MPC': 1.184, 'U': 1.224},
 }
+# Sorted band lower bounds for bisecting an annual mileage into its band
+ANNUAL_MILEAGE_LOWER_BOUNDS = sorted(ANNUAL_MILEAGE_FACTOR_LOOKUP)
 
 USAGE_TYPE_FACTOR_LOOKUP = {
     'Farm': {
@@ -254,7 +259,7 @@ class DriverFactorLookupService:
         
         # Find matching row 
         match_query = {"Coverage": coverage_key, "Assigned Driver": assigned_driver_str, "Marital Status": lookup_marital_status, "Years Driving": lookup_years_driving}
-        match_result = self.data_loader.storage_service.find(match_query,BASE_DRIVER_FACTOR_COLLECTION)
+        match_result = self.data_loader.storage_service.find(match_query, BASE_DRIVER_FACTOR_COLLECTION, BASE_DRIVER_FACTOR_PROJECTION)
         match = match_result[0] if match_result else None    
         # Deprecated match from CSV
         # match = self.base_driver_factors[
@@ -271,7 +276,7 @@ class DriverFactorLookupService:
         else:
             # Fallback logic - use the same format as the working old service
             fallback_query = {"Coverage": coverage_key, "Assigned Driver": assigned_driver_str, "Marital Status": 'All Not\n Specifically\n Listed', "Years Driving": 'All Not\n Specifically\n Listed'}
-            fallback_result = self.data_loader.storage_service.find(fallback_query, BASE_DRIVER_FACTOR_COLLECTION)
+            fallback_result = self.data_loader.storage_service.find(fallback_query, BASE_DRIVER_FACTOR_COLLECTION, BASE_DRIVER_FACTOR_PROJECTION)
             fallback = fallback_result[0] if fallback_result else None    
 
             #  Deprecated fallback from CSV
@@ -297,22 +302,21 @@ class DriverFactorLookupService:
             self.initialize()
             
         try:
+            # Create a mock driver object once (validated), shared by every coverage lookup
+            driver = Driver(
+                driver_id='temp',
+                years_licensed=years_licensed,
+                percentage_use=100.0,
+                assigned_driver=(assigned_driver == 'Yes'),
+                age=35,
+                marital_status=marital_status,
+                violations=[],
+                safety_record_level=0
+            )
             # Get factors for each coverage
             coverages = ['BIPD', 'COLL', 'COMP', 'MPC', 'UM']
             factors = {}
             for coverage in coverages:
-                # Create a mock driver object 
-                driver = Driver(
-                    driver_id='temp',
-                    years_licensed=years_licensed,
-                    percentage_use=100.0,
-                    assigned_driver=(assigned_driver == 'Yes'),
-                    age=35,
-                    marital_status=marital_status,
-                    violations=[],
-                    safety_record_level=0
-                )
-                
                 # Handle UM coverage specially - map to U for table lookup
                 if coverage == 'UM':
                     factor = self.get_base_driver_factor('U', driver)
@@ -391,22 +395,21 @@ class DriverFactorLookupService:
             self.initialize()
             
         try:
+            # Create a mock driver object once (validated), shared by every coverage lookup
+            driver = Driver(
+                driver_id='temp',
+                years_licensed=years_licensed,
+                percentage_use=100.0,
+                assigned_driver=(assigned_driver == 'Yes'),
+                age=35,
+                marital_status='M',
+                violations=[],
+                safety_record_level=0
+            )
             # Get factors for each coverage
             coverages = ['BIPD', 'COLL', 'COMP', 'MPC', 'UM']
             factors = {}
             for coverage in coverages:
-                # Create a mock driver object
-                driver = Driver(
-                    driver_id='temp',
-                    years_licensed=years_licensed,
-                    percentage_use=100.0,
-                    assigned_driver=(assigned_driver == 'Yes'),
-                    age=35,
-                    marital_status='M',
-                    violations=[],
-                    safety_record_level=0
-                )
-                
                 # Handle UM coverage specially - map to U for table lookup
                 if coverage == 'UM':
                     factor = self.get_years_licensed_factor('U', driver)
@@ -609,7 +612,7 @@ class DriverFactorLookupService:
             self.initialize()
             
         try:
-            # Create a mock usage object 
+            # Create a mock usage object (validated: single_auto comes from the caller)
             usage = Usage(
                 annual_mileage=10000,
                 type='Pleasure / Work / School',
@@ -662,43 +665,32 @@ class DriverFactorLookupService:
             
             # Get the correct column name for this coverage
             column_name = coverage_column_map.get(coverage, coverage)
-            lower_bounds = sorted(ANNUAL_MILEAGE_FACTOR_LOOKUP.keys())
-            # improvement :make this O(1) not O(n) is this our first time coding????
-            for i, lower_bound in enumerate(lower_bounds):
+            # Binary search for the band: the last lower bound <= annual_mileage
+            band = bisect_right(ANNUAL_MILEAGE_LOWER_BOUNDS, annual_mileage) - 1
+            if band < 0:
+                # Should never happen if data is correct
+                raise ValueError(f"No annual mileage band found for annual_mileage={annual_mileage}")
+
+            lower_bound = ANNUAL_MILEAGE_LOWER_BOUNDS[band]
+            try:
+                factor = ANNUAL_MILEAGE_FACTOR_LOOKUP[lower_bound][column_name]
+            except KeyError:
+                raise ValueError(
+                    f"No annual mileage factor for lower_bound={lower_bound}, coverage={column_name}"
+                )
+
+            if band == len(ANNUAL_MILEAGE_LOWER_BOUNDS) - 1:
                 # Last band: open-ended (33950+)
-                if i == len(lower_bounds) - 1:
-                    if annual_mileage >= lower_bound:
-                        try:
-                            factor = ANNUAL_MILEAGE_FACTOR_LOOKUP[lower_bound][column_name]
-                        except KeyError:
-                            raise ValueError(
-                                f"No annual mileage factor for lower_bound={lower_bound}, coverage={column_name}"
-                            )
-
-                        logger.info(
-                            f"Annual mileage factor for {coverage} (lower_bound {lower_bound}+): {factor}"
-                        )
-                        return float(factor)
-
-                # Normal band
-                next_lower_bound = lower_bounds[i + 1]
-                if lower_bound <= annual_mileage < next_lower_bound:
-                    try:
-                        factor = ANNUAL_MILEAGE_FACTOR_LOOKUP[lower_bound][column_name]
-                    except KeyError:
-                        raise ValueError(
-                            f"No annual mileage factor for lower_bound={lower_bound}, coverage={column_name}"
-                        )
-
-                    logger.info(
-                        f"Annual mileage factor for {coverage} "
-                        f"(range {lower_bound}–{next_lower_bound - 1}): {factor}"
-                    )
-                    return float(factor)
-
-            # Should never happen if data is correct
-            raise ValueError(f"No annual mileage band found for annual_mileage={annual_mileage}")
-            return 1.0
+                logger.info(
+                    f"Annual mileage factor for {coverage} (lower_bound {lower_bound}+): {factor}"
+                )
+            else:
+                next_lower_bound = ANNUAL_MILEAGE_LOWER_BOUNDS[band + 1]
+                logger.info(
+                    f"Annual mileage factor for {coverage} "
+                    f"(range {lower_bound}–{next_lower_bound - 1}): {factor}"
+                )
+            return float(factor)
             # DEPRECATED
             # # Find the appropriate mileage band
             # for _, row in self.annual_mileage_factors.iterrows():
@@ -893,7 +885,8 @@ class DriverFactorLookupService:
             # Use the existing DiscountService to calculate discount factors
             # We need to create a mock special_factors object since the method signature requires it
 
-            special_factors = SpecialFactors(
+            # Fields are copied from the already-validated Discounts model, so skip re-validation
+            special_factors = SpecialFactors.model_construct(
                 federal_employee=getattr(discounts, 'federal_employee', False),
                 transportation_network_company=getattr(discounts, 'transportation_network_company', False),
                 transportation_of_friends=getattr(discounts, 'transportation_of_friends', False)
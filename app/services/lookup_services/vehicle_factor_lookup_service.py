@@ -22,7 +22,7 @@ class VehicleFactorLookupService:
         self.vehicle_rating_groups: pd.DataFrame = None
         self.fallback_vehicle_rating_groups: pd.DataFrame = None
         self.model_year_factors: pd.DataFrame = None
-        self.lrg_factors: pd.DataFrame = None
+        self.lrg_factors: Dict[int, Dict] = None
         # self.vehicle_rates_vector_db = get_vehicle_rates_db()
         self.vehicle_rates_chromadb = get_vehicle_rates_chromadb()
     def initialize(self):
@@ -30,7 +30,7 @@ class VehicleFactorLookupService:
         self.vehicle_rating_groups = self.data_loader.load_vehicle_ratings_groups()
         self.fallback_vehicle_rating_groups = self.data_loader.load_fallback_vehicle_rating_groups()
         self.model_year_factors = self.data_loader.load_model_year_factors()
-        self.lrg_factors = self.data_loader.load_lrg_code_factors()
+        self.lrg_factors = self.data_loader.load_lrg_code_factors_dict()
         
         logger.info("VehicleFactorLookupService initialized")
         
@@ -201,9 +201,9 @@ class VehicleFactorLookupService:
             self.initialize()
             
         try:
-            # Since the DataFrame is indexed by 'lrg', we can access it directly
-            if lrg_code in self.lrg_factors.index:
-                factor = self.lrg_factors.loc[lrg_code, 'factor']
+            # {lrg: row} dict, so we can access it directly
+            if lrg_code in self.lrg_factors:
+                factor = self.lrg_factors[lrg_code]['factor']
                 logger.info(f"LRG factor for {coverage} at LRG {lrg_code}: {factor}")
                 return float(factor)
             else:
@@ -1,11 +1,29 @@
+import sys
 import pandas as pd
 import logging
+from functools import lru_cache
 from typing import List
 from app.utils.data_loader import DataLoader, VEHICLE_RATES
 from app.services.storage_service import StorageService
 
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=50_000)
+def _canonical_text(text: str) -> str:
+    return sys.intern(text.upper())
+
+
+def canonical_vehicle_value(value) -> str:
+    """
+    Matching key for an enum-like vehicle field: upper-cased and interned, '' when missing.
+    Used only for comparisons; vehicle dicts keep their display values.
+    """
+    if value is None or value == '' or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    return _canonical_text(str(value))
+
+
 class VehicleLookupService:
     """
     Service for providing vehicle data for cascading dropdowns.
@@ -18,7 +36,7 @@ class VehicleLookupService:
     def _load_vehicle_data(self):
         """Load vehicle data if not already loaded."""
         if self.vehicle_data is None:
-            self.vehicle_data = StorageService().get_collection_as_dataframe(VEHICLE_RATES)
+            self.vehicle_data = StorageService.instance().get_collection_as_dataframe(VEHICLE_RATES, projection={'_id': 0})
             logger.info(f"Vehicle data loaded for lookup service from MongoDB collection: {VEHICLE_RATES}")
             #self.vehicle_data = self.data_loader.load_table('car_factors/auto_ratings_2024_2001.csv')
             #logger.info("Vehicle data loaded for lookup service")
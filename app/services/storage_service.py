@@ -1,11 +1,20 @@
 import os
+import threading
 from dotenv import load_dotenv, find_dotenv
 from enum import Enum
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne
 from pymongo.errors import ConnectionFailure, PyMongoError
 import logging
+from typing import List, Optional
 import pandas as pd
 
+try:
+    # Optional: decodes BSON straight into Arrow columns, skipping per-document dicts
+    from pymongoarrow.api import find_arrow_all, find_pandas_all
+    PYMONGOARROW_AVAILABLE = True
+except ImportError:
+    PYMONGOARROW_AVAILABLE = False
+
 load_dotenv(find_dotenv())
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -15,29 +24,39 @@ class STORAGE_COLLECTIONS(Enum):
 
 class StorageService:
     _instance = None
+    _lock = threading.Lock()
     
     COLLECTIONS =  {
        
         
     }
 
-    def __new__(cls, *args, **kwargs):
+    @classmethod
+    def instance(cls) -> 'StorageService':
+        """Returns the shared service, connecting to MongoDB exactly once even under concurrent first calls."""
         if cls._instance is None:
-            cls._instance = super(StorageService, cls).__new__(cls)
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls._create()
         return cls._instance
 
-    def __init__(self):
-        if not hasattr(self, '_initialized'): # Ensure __init__ is called only once for singleton
-            self.MONGO_HOST = os.environ.get("MONGO_HOST", "localhost")
-            self.MONGO_PORT = int(os.environ.get("MONGO_PORT", 27017))
-            self.MONGO_DB_NAME = os.environ.get("MONGO_DB_NAME", "coveragecompassai")
-            self.MONGO_USER = os.environ.get("MONGO_USER", "")
-            self.MONGO_PASSWORD = os.environ.get("MONGO_PASSWORD", "")
-            self._client = None
-            self._db = None
-            # self._collection = None
-            self._initialized = True
-            self.connect()
+    @classmethod
+    def _create(cls) -> 'StorageService':
+        self = super(StorageService, cls).__new__(cls)
+        self.MONGO_HOST = os.environ.get("MONGO_HOST", "localhost")
+        self.MONGO_PORT = int(os.environ.get("MONGO_PORT", 27017))
+        self.MONGO_DB_NAME = os.environ.get("MONGO_DB_NAME", "coveragecompassai")
+        self.MONGO_USER = os.environ.get("MONGO_USER", "")
+        self.MONGO_PASSWORD = os.environ.get("MONGO_PASSWORD", "")
+        self._client = None
+        self._db = None
+        # self._collection = None
+        self.connect()
+        return self
+
+    def __new__(cls, *args, **kwargs):
+        # StorageService() still works and returns the shared instance; prefer StorageService.instance()
+        return cls.instance()
 
     def connect(self):
         try:
@@ -64,13 +83,20 @@ class StorageService:
             self._client.close()
             logging.info("MongoDB connection closed.")
 
-    def find(self, query: dict, collection_name: str):
+    def find(self, query: dict, collection_name: str, projection: Optional[dict] = None, as_arrow: bool = False):
         if self._db is None:
             raise ConnectionError("MongoDB database not initialized. Call connect() first.")
         try:
             collection = self._db[collection_name]
-            logging.info(f"Finding documents in collection '{collection_name}' with query: {query}")
-            return list(collection.find(query))
+            # Hot path (per-quote lookups): debug level, %-style so the query is only formatted when emitted
+            logging.debug("Finding documents in collection '%s' with query: %r", collection_name, query)
+            if as_arrow:
+                # Columnar pyarrow.Table decoded straight from BSON, for large scans that don't need dicts
+                if not PYMONGOARROW_AVAILABLE:
+                    raise ImportError("find(as_arrow=True) requires the 'pymongoarrow' package")
+                return find_arrow_all(collection, query, projection=projection)
+            # projection limits the fields the server sends back, e.g. {'Factor': 1, '_id': 0}
+            return list(collection.find(query, projection))
         except PyMongoError as e:
             logging.error(f"Error finding documents in collection {collection_name}: {e}")
             return []
@@ -102,6 +128,27 @@ class StorageService:
             logging.error(f"Error inserting/upserting document in collection {collection_name}: {e}")
             return None
 
+    def bulk_upsert(self, documents: List[dict], collection_name: str) -> int:
+        """
+        Upserts many documents by _id in a single unordered bulk_write round-trip.
+
+        Returns:
+            The number of documents inserted or modified.
+        """
+        if self._db is None:
+            raise ConnectionError("MongoDB database not initialized. Call connect() first.")
+        if not documents:
+            return 0
+        try:
+            collection = self._db[collection_name]
+            operations = [ReplaceOne({"_id": document["_id"]}, document, upsert=True) for document in documents]
+            result = collection.bulk_write(operations, ordered=False)
+            logging.info(f"Bulk upsert into collection {collection_name}: {result.upserted_count} inserted, {result.modified_count} modified")
+            return result.upserted_count + result.modified_count
+        except PyMongoError as e:
+            logging.error(f"Error bulk upserting documents in collection {collection_name}: {e}")
+            return 0
+
     def update_one(self, query: dict, update: dict, collection_name: str):
         if self._db is None:
             raise ConnectionError("MongoDB database not initialized. Call connect() first.")
@@ -126,12 +173,15 @@ class StorageService:
             logging.error(f"Error deleting document from collection {collection_name}: {e}")
             return 0 
 
-    def get_collection_as_dataframe(self, collection_name: str) -> pd.DataFrame:
+    def get_collection_as_dataframe(self, collection_name: str, projection: Optional[dict] = None,
+                                    batch_size: int = 5000) -> pd.DataFrame:
         """
         Fetches all documents from a specified collection and returns them as a pandas DataFrame.
         
         Args:
             collection_name: The name of the collection to fetch.  
+            projection: Optional MongoDB projection to drop unused fields (e.g. {'_id': 0}).
+            batch_size: Cursor batch size used when pymongoarrow is not installed.
         
         Returns:
             A pandas DataFrame containing the collection data.
@@ -139,15 +189,19 @@ class StorageService:
         if self._db is None:
             raise ConnectionError("MongoDB database not initialized. Call connect() first.")
         try:
-            logging.info(f"Fetching all documents from collection: '{collection_name}'")
-            # Pass an empty query to find all documents
-            documents = self.find({}, collection_name)
-            if not documents:
+            logging.info("Fetching all documents from collection: '%s'", collection_name)
+            collection = self._db[collection_name]
+            if PYMONGOARROW_AVAILABLE:
+                df = find_pandas_all(collection, {}, projection=projection)
+            else:
+                # Build the frame from the cursor instead of an intermediate list of documents
+                cursor = collection.find({}, projection).batch_size(batch_size)
+                df = pd.DataFrame.from_records(cursor)
+            if df.empty:
                 logging.warning(f"No documents found in collection '{collection_name}'.")
                 return pd.DataFrame()
             
-            df = pd.DataFrame(documents)
             return df
         except PyMongoError as e:
             logging.error(f"Error fetching collection {collection_name} as DataFrame: {e}")
-            return pd.DataFrame() # Return empty dataframe on error
\ No newline at end of file
+            return pd.DataFrame() # Return empty dataframe on error
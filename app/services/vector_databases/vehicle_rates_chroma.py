@@ -1,12 +1,18 @@
 import os
+import numpy as np
 import pandas as pd
 import chromadb
+import torch
 import shutil
 import time
 import re
-from chromadb.utils import embedding_functions
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Optional
 from dotenv import load_dotenv, find_dotenv
+from app.services.vector_databases.vehicle_vector_utils import BatchedSentenceTransformer
 
 load_dotenv(find_dotenv())
 
@@ -32,10 +38,146 @@ def _download_chroma_from_s3(bucket: str, prefix: str, local_dir: str) -> None:
             os.makedirs(os.path.dirname(dest), exist_ok=True)
             s3.download_file(bucket, key, dest)
     print(f"[Chroma] Download complete.")
-MODEL_STOP_WORDS = {
+MODEL_STOP_WORDS = frozenset({
     'class', 'series', 'sedan', 'suv', 'coupe', 'ev', 'hybrid', 
     'benz', 'na', 'n', 'a', '-', 'dr', '4d', '2d'
-}
+})
+
+# Rows per collection.add call while indexing (Chroma's add path is fastest around 100-250)
+BATCH_SIZE = 200
+
+# SentenceTransformer forward-pass batch size when embedding documents
+EMBEDDING_BATCH_SIZE = 256
+
+
+def _embedding_device():
+    """
+    Device for the SentenceTransformer: EMBEDDING_DEVICE env var if set,
+    else CUDA, then Apple Silicon MPS, then CPU.
+    """
+    device = os.getenv("EMBEDDING_DEVICE")
+    if device:
+        return device
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+# Number of recent query_vehicles results kept per VehicleRatesChromaDB
+QUERY_CACHE_SIZE = 1024
+
+
+def _freeze(value):
+    """Hashable form of a (possibly nested) dict/list argument, for cache keys."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# Minimum number of Chroma candidates fetched for a boosted (re-ranked) query
+RERANK_FETCH_K = 200
+
+# Tokenizer patterns, compiled once
+# Every letter/digit boundary in one pass (same as splitting letter->digit, then digit->letter)
+_RE_LETTER_DIGIT = re.compile(r'(?<=[a-zA-Z])(?=[0-9])|(?<=[0-9])(?=[a-zA-Z])')
+_RE_NONWORD = re.compile(r'[^a-z0-9\s]+')
+# For ASCII input: lowercase, hyphens -> spaces and strip non-alphanumerics in a single translate
+_ASCII_TOKEN_TABLE = str.maketrans({
+    chr(c): _RE_NONWORD.sub('', chr(c).lower().replace('-', ' ')) for c in range(128)
+})
+
+
+@lru_cache(maxsize=8192)
+def _tokenize_model(model_name):
+    """
+    Helper to robustly tokenize model/trim names and remove stop words.
+    Splits letters from numbers (e.g., 'EQB300' -> 'eqb 300').
+    Cached on the raw value, so it returns a frozenset that callers can share.
+    """
+    if not model_name: return frozenset()
+    # Insert space between letters and numbers
+    s = _RE_LETTER_DIGIT.sub(' ', str(model_name))
+
+    # Replace hyphens with spaces, strip non-alphanumeric, lowercase
+    if s.isascii():
+        tokens = s.translate(_ASCII_TOKEN_TABLE)
+    else:
+        tokens = _RE_NONWORD.sub('', s.lower().replace('-', ' '))
+
+    # Split by space, filter out empty tokens and stop words
+    return frozenset(t for t in tokens.split() if t and t not in MODEL_STOP_WORDS)
+
+
+# Shared token vocabulary: each token gets one bit, so a token set is a Python int bitmask
+_TOKEN_VOCAB = {}
+_TOKEN_VOCAB_LOCK = threading.Lock()
+
+
+def _tokens_to_mask(tokens):
+    """Bitmask of a token set over the shared vocabulary, assigning bits to new tokens."""
+    missing = [t for t in tokens if t not in _TOKEN_VOCAB]
+    if missing:
+        with _TOKEN_VOCAB_LOCK:
+            for t in missing:
+                _TOKEN_VOCAB.setdefault(t, len(_TOKEN_VOCAB))
+    mask = 0
+    for t in tokens:
+        mask |= 1 << _TOKEN_VOCAB[t]
+    return mask
+
+
+@lru_cache(maxsize=8192)
+def _tokenize_mask(model_name):
+    """Bitmask of _tokenize_model(model_name) over the shared vocabulary."""
+    return _tokens_to_mask(_tokenize_model(model_name))
+
+
+@lru_cache(maxsize=8192)
+def _token_string_mask(token_string):
+    """Bitmask of a stored "<field>_tokens" value (space-joined tokens), with no regex work."""
+    return _tokens_to_mask(token_string.split())
+
+
+# Metadata fields whose tokens are stored at index time as "<field>_tokens"
+TOKEN_FIELDS = ('make', 'model', 'series', 'package', 'style')
+
+
+def _token_string(value):
+    """Space-joined, sorted tokens of a metadata value, as stored in "<field>_tokens"."""
+    return " ".join(sorted(_tokenize_model(value)))
+
+
+def _candidate_mask(meta, field):
+    """Token bitmask of a candidate field, read from its precomputed "<field>_tokens" metadata when present."""
+    tokens = meta.get(f'{field}_tokens')
+    if tokens is None:
+        # Stores indexed before token metadata existed
+        return _tokenize_mask(meta.get(field, ''))
+    return _token_string_mask(tokens)
+
+def _clean_column(df, col, missing="N/A"):
+    """
+    Column-wise clean: NaN -> "N/A", strip, and NORMALIZE special hyphens to ASCII.
+    A column absent from the CSV becomes `missing` for every row.
+    """
+    if col not in df.columns:
+        return pd.Series(missing, index=df.index, dtype=object)
+    values = df[col]
+    cleaned = values.astype(str).str.strip().str.replace('‐', '-', regex=False)
+    return cleaned.where(values.notna(), "N/A")
+
+
+def _rating_column(df, name):
+    """Rating column as strings, accepting lower- or upper-case headers."""
+    for col in (name, name.upper()):
+        if col in df.columns:
+            return df[col].astype(str)
+    return pd.Series('', index=df.index, dtype=object)
+
 
 class VehicleRatesChromaDB:
     def __init__(self, ratings_csv_path, db_folder="./vehicle_rates_chroma_db", force_reindex=False):
@@ -54,8 +196,10 @@ class VehicleRatesChromaDB:
         self.client = chromadb.PersistentClient(path=db_folder)
         
         # 3. Define the embedding model
-        self.emb_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-mpnet-base-v2"
+        self.emb_fn = BatchedSentenceTransformer(
+            model_name="all-mpnet-base-v2",
+            device=_embedding_device(),
+            batch_size=EMBEDDING_BATCH_SIZE
         )
         
         # 4. Get or Create the Collection
@@ -64,6 +208,10 @@ class VehicleRatesChromaDB:
             embedding_function=self.emb_fn
         )
         
+        # Recent query_vehicles results, least recently used first
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+
         # 5. Check if we need to index data
         if self.collection.count() == 0:
             print("Database is empty. Indexing your CSV file now...")
@@ -81,95 +229,91 @@ class VehicleRatesChromaDB:
         print(f"Reading CSV from: {csv_path}")
         df = pd.read_csv(csv_path)
         
-        documents = []
-        metadatas = []
-        ids = []
-        
         print(f"Preparing {len(df)} rows for indexing...")
-        
-        for idx, row in df.iterrows():
-            # Helper to safely get string values and NORMALIZE hyphens
-            def clean(val): 
-                if pd.isna(val): return "N/A"
-                s = str(val).strip()
-                # Normalize special hyphens to standard ASCII hyphen
-                s = s.replace('‐', '-') 
-                return s
-            
-            # Create semantic string used for embedding
-            semantic_text = (
-                f"Year: {row.get('YEAR')} "
-                f"Make: {clean(row.get('MAKE'))} " 
-                f"Model: {clean(row.get('MODEL'))} "
-                f"Series: {clean(row.get('SERIES'))} " 
-                f"Option: {clean(row.get('OPTIONPACKAGE'))} " 
-                f"Body: {clean(row.get('BODYSTYLE'))} "
-                f"Engine: {clean(row.get('ENGINE'))} " 
-                f"Wheelbase: {clean(row.get('WHEELBASE', clean(row.get('Wheelbase'))))} " # Handle casing
-            )
-            
-            documents.append(semantic_text)
-            
-            # Store Metadata for retrieval and filtering if needed
-            metadatas.append({
-                "year": int(row['YEAR']) if pd.notna(row.get('YEAR')) else 0,
-                "make": clean(row.get('MAKE')),
-                "model": clean(row.get('MODEL')),
-                "series": clean(row.get('SERIES', '')),
-                "package": clean(row.get('OPTIONPACKAGE', '')),
-                "style": clean(row.get('BODYSTYLE', '')),
-                "engine": clean(row.get('ENGINE', '')),  
-                "wheelbase": clean(row.get('WHEELBASE', clean(row.get('Wheelbase', '')))),
-                # Store ratings in metadata for easy access
-                "grg": str(row.get('grg', row.get('GRG', ''))),
-                "drg": str(row.get('drg', row.get('DRG', ''))),
-                "vsd": str(row.get('vsd', row.get('VSD', ''))),
-                "lrg": str(row.get('lrg', row.get('LRG', '')))
-            })
-            ids.append(str(idx))
-            
+
+        # Cleaned text columns; a missing column reads "N/A" in the semantic text but "" in metadata
+        make = _clean_column(df, 'MAKE')
+        model = _clean_column(df, 'MODEL')
+        series = _clean_column(df, 'SERIES')
+        package = _clean_column(df, 'OPTIONPACKAGE')
+        style = _clean_column(df, 'BODYSTYLE')
+        engine = _clean_column(df, 'ENGINE')
+        wheelbase_col = 'WHEELBASE' if 'WHEELBASE' in df.columns else 'Wheelbase' # Handle casing
+        wheelbase = _clean_column(df, wheelbase_col)
+        year = df['YEAR'].astype(str) if 'YEAR' in df.columns else pd.Series('None', index=df.index)
+
+        # Create semantic strings used for embedding
+        documents = (
+            "Year: " + year + " "
+            "Make: " + make + " "
+            "Model: " + model + " "
+            "Series: " + series + " "
+            "Option: " + package + " "
+            "Body: " + style + " "
+            "Engine: " + engine + " "
+            "Wheelbase: " + wheelbase + " "
+        ).tolist()
+
+        # Store Metadata for retrieval and filtering if needed
+        metadata_df = pd.DataFrame({
+            "year": df['YEAR'].fillna(0).astype(int) if 'YEAR' in df.columns else 0,
+            "make": make,
+            "model": model,
+            "series": _clean_column(df, 'SERIES', missing=''),
+            "package": _clean_column(df, 'OPTIONPACKAGE', missing=''),
+            "style": _clean_column(df, 'BODYSTYLE', missing=''),
+            "engine": _clean_column(df, 'ENGINE', missing=''),
+            "wheelbase": _clean_column(df, wheelbase_col, missing=''),
+            # Store ratings in metadata for easy access
+            "grg": _rating_column(df, 'grg'),
+            "drg": _rating_column(df, 'drg'),
+            "vsd": _rating_column(df, 'vsd'),
+            "lrg": _rating_column(df, 'lrg'),
+        }, index=df.index)
+        # Precomputed tokens, so queries only tokenize their own targets
+        for field in TOKEN_FIELDS:
+            metadata_df[f'{field}_tokens'] = metadata_df[field].map(_token_string)
+        metadatas = metadata_df.to_dict(orient='records')
+        ids = df.index.astype(str).tolist()
+
         # Batch Insertion
-        BATCH_SIZE = 2000
         total_docs = len(documents)
         
         print(f"Starting batch insertion (Batch Size: {BATCH_SIZE})...")
         
-        for i in range(0, total_docs, BATCH_SIZE):
-            end_idx = min(i + BATCH_SIZE, total_docs)
-            self.collection.add(
-                documents=documents[i:end_idx],
-                metadatas=metadatas[i:end_idx],
-                ids=ids[i:end_idx]
-            )
-            print(f"  - Indexed {end_idx}/{total_docs}")
+        # One writer thread: adds stay sequential, but overlap with embedding the next batch
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending = None
+            for i in range(0, total_docs, BATCH_SIZE):
+                end_idx = min(i + BATCH_SIZE, total_docs)
+                # Embed here (same model as queries) and hand Chroma the vectors
+                embeddings = self.emb_fn(documents[i:end_idx])
+                if pending is not None:
+                    pending.result()  # Re-raises a failed add
+                    print(f"  - Indexed {i}/{total_docs}")
+                pending = writer.submit(
+                    self.collection.add,
+                    documents=documents[i:end_idx],
+                    embeddings=embeddings,
+                    metadatas=metadatas[i:end_idx],
+                    ids=ids[i:end_idx]
+                )
+            if pending is not None:
+                pending.result()
+                print(f"  - Indexed {total_docs}/{total_docs}")
             
         print("Indexing Complete.")
 
     def _tokenize_model(self, model_name):
-        """
-        Helper to robustly tokenize model/trim names and remove stop words.
-        Splits letters from numbers (e.g., 'EQB300' -> 'eqb 300').
-        """
-        if not model_name: return set()
-        # Insert space between letters and numbers
-        s = re.sub(r'([a-zA-Z])([0-9])', r'\1 \2', str(model_name))
-        s = re.sub(r'([0-9])([a-zA-Z])', r'\1 \2', s)
-        
-        # Replace hyphens/slashes with spaces, strip non-alphanumeric, lowercase
-        tokens = re.sub(r'[^a-z0-9\s]+', '', s.lower().replace('-', ' '))
-        
-        # Split by space, filter out empty tokens and stop words
-        return set(filter(lambda t: t and t not in MODEL_STOP_WORDS, tokens.split()))
-
-    def _jaccard_similarity(self, set_a, set_b):
-        """Calculates Jaccard similarity between two sets."""
-        if not set_a and not set_b:
-            return 0.0 
-        intersection = set_a.intersection(set_b)
-        union = set_a.union(set_b)
+        """Tokenizes a model/trim name (see module-level _tokenize_model, which is cached)."""
+        return _tokenize_model(model_name)
+
+    def _jaccard_similarity(self, mask_a, mask_b):
+        """Calculates Jaccard similarity between two token bitmasks (see _tokenize_mask)."""
+        union = mask_a | mask_b
         if not union:
-             return 0.0
-        return len(intersection) / len(union)
+            return 0.0
+        return (mask_a & mask_b).bit_count() / union.bit_count()
 
     def query_vehicles(self, query_text, where_clause=None, n_results=5, boost_targets=None, boost_weights=None):
         """
@@ -183,66 +327,128 @@ class VehicleRatesChromaDB:
             boost_weights (dict): Optional weights for boosting (e.g. {'year': 0.5}).
         """
         print(f"Querying for: '{query_text}'")
+
+        # Repeated queries (same text, filter and boosts) are answered from the cache
+        cache_key = (query_text, _freeze(where_clause), n_results, _freeze(boost_targets), _freeze(boost_weights))
+        with self._query_cache_lock:
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                self._query_cache.move_to_end(cache_key)
+        if cached is not None:
+            return [dict(hit) for hit in cached]
         
-        # 1. Fetch more results if boosting is enabled to allow for re-ranking
-        fetch_k = n_results * 10 if boost_targets else n_results
+        # 1. Fetch a wider candidate set if boosting is enabled to allow for re-ranking
+        fetch_k = max(n_results * 10, RERANK_FETCH_K) if boost_targets else n_results
         
         results = self.collection.query(
             query_texts=[query_text],
             n_results=fetch_k,
             where=where_clause  
         )
-        
+        hits = self._rerank_one(results, 0, n_results, boost_targets, boost_weights)
+
+        with self._query_cache_lock:
+            self._query_cache[cache_key] = [dict(hit) for hit in hits]
+            if len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return hits
+
+    def search_batch(self, query_texts, boost_targets_list, boost_weights=None, n_results=5, where_clause=None):
+        """
+        query_vehicles for several queries with a single collection.query call,
+        so the embeddings and HNSW lookups run as one batch.
+        Returns one hit list per query, in order.
+        """
+        if not query_texts:
+            return []
+
+        fetch_k = max(n_results * 10, RERANK_FETCH_K) if any(boost_targets_list) else n_results
+        results = self.collection.query(
+            query_texts=list(query_texts),
+            n_results=fetch_k,
+            where=where_clause
+        )
+        return [
+            self._rerank_one(results, q, n_results, boost_targets_list[q], boost_weights)
+            for q in range(len(query_texts))
+        ]
+
+    def _rerank_one(self, results, q, n_results, boost_targets, boost_weights):
+        """Boosts and re-ranks the candidates of query number q in a Chroma query result."""
         hits = []
-        if results['ids'] and len(results['ids']) > 0:
+        if results['ids'] and len(results['ids']) > q:
             
-            # Pre-tokenize targets if boosting
+            metas = results['metadatas'][q]
+            distances = results['distances'][q]
+
+            scores = np.asarray(distances, dtype=float)
+
+            # --- BOOSTING LOGIC ---
+            # Every boost is computed for all candidates at once and fused into one score expression
             if boost_targets:
-                target_make_tokens = self._tokenize_model(boost_targets.get('make', ''))
-                target_model_tokens = self._tokenize_model(boost_targets.get('model', ''))
-                target_trim_tokens = self._tokenize_model(boost_targets.get('trim', ''))
-                target_style_tokens = self._tokenize_model(boost_targets.get('style', ''))
-                
                 # Default weights if not provided
                 if not boost_weights:
                     boost_weights = {'make': 2.0, 'model': 1.0, 'year': 0.5, 'trim': 0.5, 'style': 0.5}
 
-            for i in range(len(results['ids'][0])):
-                meta = results['metadatas'][0][i]
-                dist = results['distances'][0][i]
-                
-                # --- BOOSTING LOGIC ---
-                new_score = dist
-                if boost_targets:
-                     # A. Make Boost
-                    candidate_make_tokens = self._tokenize_model(meta.get('make', ''))
-                    jaccard_score_make = self._jaccard_similarity(target_make_tokens, candidate_make_tokens)
-                    new_score -= (boost_weights.get('make', 0.0) * jaccard_score_make)
-                    
-                    # B. Model Boost
-                    candidate_model_tokens = self._tokenize_model(meta.get('model', ''))
-                    jaccard_score_model = self._jaccard_similarity(target_model_tokens, candidate_model_tokens)
-                    new_score -= (boost_weights.get('model', 0.0) * jaccard_score_model)
-
-                    # C. Year Boost
-                    target_year = int(boost_targets.get('year', 0))
-                    candidate_year = int(meta.get('year', 0))
-                    if target_year > 0 and candidate_year > 0:
-                        if candidate_year == target_year:
-                            new_score -= boost_weights.get('year', 0.0)
-                        elif abs(candidate_year - target_year) <= 2:
-                            new_score -= (boost_weights.get('year', 0.0) / 2)
-                            
-                    # D. Trim/Style/Description Boost
-                    # We compare target 'trim' against candidate 'description' (which usually contains trim info) or 'style'
-                    # Construct a combined string from metadata to check against trim
-                    candidate_desc_tokens = self._tokenize_model(meta.get('series', '') + ' ' + meta.get('package', '') + ' ' + meta.get('style', ''))
-                    jaccard_score_trim = self._jaccard_similarity(target_trim_tokens, candidate_desc_tokens)
-                    new_score -= (boost_weights.get('trim', 0.0) * jaccard_score_trim)
+                def jaccard_scores(target_value, candidate_masks):
+                    """Jaccard of the target's token mask against every candidate's mask."""
+                    target_mask = _tokenize_mask(target_value)
+                    return np.fromiter(
+                        (self._jaccard_similarity(target_mask, mask) for mask in candidate_masks),
+                        dtype=float, count=len(metas)
+                    )
+
+                # A/B. Make & Model Boost
+                make_scores = jaccard_scores(boost_targets.get('make', ''), [_candidate_mask(meta, 'make') for meta in metas])
+                model_scores = jaccard_scores(boost_targets.get('model', ''), [_candidate_mask(meta, 'model') for meta in metas])
+
+                # C. Year Boost: full weight on an exact match, half within 2 years, none for unknown years
+                year_weight = boost_weights.get('year', 0.0)
+                target_year = int(boost_targets.get('year', 0))
+                candidate_years = np.array([int(meta.get('year', 0)) for meta in metas])
+                year_gap = np.abs(candidate_years - target_year)
+                year_boosts = np.where((target_year <= 0) | (candidate_years <= 0), 0.0,
+                                       np.where(year_gap == 0, year_weight,
+                                                np.where(year_gap <= 2, year_weight / 2, 0.0)))
+
+                # D. Trim/Style/Description Boost
+                # We compare target 'trim' against candidate 'description' (series + package + style),
+                # which usually contains the trim info. Tokens never span fields, so the description's
+                # mask is the OR of each field's (separately cached) mask.
+                trim_scores = jaccard_scores(
+                    boost_targets.get('trim', ''),
+                    [
+                        _candidate_mask(meta, 'series') | _candidate_mask(meta, 'package') | _candidate_mask(meta, 'style')
+                        for meta in metas
+                    ]
+                )
+
+                scores = (scores
+                          - boost_weights.get('make', 0.0) * make_scores
+                          - boost_weights.get('model', 0.0) * model_scores
+                          - year_boosts
+                          - boost_weights.get('trim', 0.0) * trim_scores)
+
+            match_scores = [round(score, 4) for score in scores.tolist()]
+
+            # Keep the n_results lowest Match Scores (lower is better in distance-based, and we subtracted
+            # boosts, so lower is still better) without sorting every candidate: partition to find the
+            # k-th score, then stable-sort only the candidates at or below it so ties keep Chroma's order
+            rounded_scores = np.array(match_scores, dtype=float)
+            k = min(n_results, len(rounded_scores))
+            if 0 < k < len(rounded_scores):
+                kth_score = np.partition(rounded_scores, k - 1)[k - 1]
+                shortlist = np.flatnonzero(rounded_scores <= kth_score)
+            else:
+                shortlist = np.arange(len(rounded_scores))
+            top = shortlist[np.argsort(rounded_scores[shortlist], kind='stable')][:k]
+
+            for i in top.tolist():
+                meta = metas[i]
                 ## YEAR YEAR YEAR IF NOT FOUND THEN SET TO YEAR THE SAME SO AI DOES NOT ASK WHICH YEAR
                 hits.append({
-                    "Vehicle Info": results['documents'][0][i], # Vehicle Info
-                    "year":  boost_targets.get('year', meta.get('year')),
+                    "Vehicle Info": results['documents'][q][i], # Vehicle Info
+                    "year": boost_targets.get('year', meta.get('year')) if boost_targets else meta.get('year'),
                     "make": meta.get('make'), # make
                     "model": meta.get('model'), # model
                     "series": meta.get('series'), # series
@@ -254,15 +460,11 @@ class VehicleRatesChromaDB:
                     "drg": meta.get('drg'), # drg
                     "vsd": meta.get('vsd'), # vsd
                     "lrg": meta.get('lrg'), # lrg
-                    "Match Score": round(new_score, 4), 
-                    "Original Distance": round(dist, 4),
+                    "Match Score": match_scores[i], 
+                    "Original Distance": round(distances[i], 4),
                 })
         
-        # Sort by new score (lower is better in distance-based, but we subtracted boosts, so lower is still better)
-        # Using L2 distance, smaller is better. Subtracting positive boost makes it smaller (better).
-        hits.sort(key=lambda x: x['Match Score'])
-        
-        return hits[:n_results]
+        return hits
 
     def search_by_vin_data(self, vin_data, boosting=True, boost_weights=None):
         """
@@ -1,5 +1,23 @@
+import hashlib
 import os
+import orjson
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from app.services.vector_databases.vehicle_vector_utils import TOKEN_FIELDS, add_deduplicated, add_token_columns
+
+BATCH_SIZE = 2000
+
+TEXT_COLUMNS = ('make', 'model', 'series', 'package', 'style', 'engine')
+METADATA_COLUMNS = ('year',) + TEXT_COLUMNS + ('grg', 'drg', 'vsd', 'lrg', 'expiration')
+# Set DEBUG_MAKE (e.g. DEBUG_MAKE=RIVIAN) to print that make's rows while indexing
+_DEBUG_MAKE = os.environ.get('DEBUG_MAKE')
+
+def _content_id(document, metadata):
+    """Deterministic row id: a SHA-1 prefix of the semantic text plus its metadata."""
+    digest = hashlib.sha1(document.encode())
+    digest.update(orjson.dumps(metadata, option=orjson.OPT_SORT_KEYS))
+    return 'csv_' + digest.hexdigest()[:16]
 
 class CsvDataLoader():
     """Loads vehicle data from a CSV file."""
@@ -9,64 +27,61 @@ class CsvDataLoader():
             raise FileNotFoundError(f"Could not find CSV file at path: {csv_path}")
         self.csv_path = csv_path
 
-    def index_data(self, collection):
+    def index_data(self, collection, embedding_function=None):
         """
         Reads data from the CSV file and indexes it into ChromaDB.
+        The file is read in BATCH_SIZE chunks; each chunk is transformed while the previous one is being added.
+        embedding_function: the collection's embedding function, so each distinct document is embedded once.
         """
-        df = pd.read_csv(self.csv_path)
-        
-        documents = []
-        metadatas = []
-        ids = []
-        
-        print(f"Preparing {len(df)} rows from CSV for indexing...")
-        
-        for idx, row in df.iterrows():
-            def clean(val): return str(val).strip() if pd.notna(val) else "N/A"
+        print(f"Starting chunked indexing from CSV (Batch Size: {BATCH_SIZE})...")
+        total_docs = 0
+        # One writer thread: adds stay sequential, but overlap with parsing/transforming the next chunk
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending = None
+            for chunk in pd.read_csv(self.csv_path, chunksize=BATCH_SIZE):
+                documents, metadatas, ids = self._prepare_batch(chunk)
+                if pending is not None:
+                    pending.result()  # Re-raises a failed add
+                    print(f"  - Indexed {total_docs}")
+                pending = writer.submit(add_deduplicated, collection, documents, metadatas, ids, embedding_function)
+                total_docs += len(ids)
+            if pending is not None:
+                pending.result()
 
-            # Create semantic string
-            semantic_text = (
-                f"{row.get('year')} {clean(row.get('make'))} {clean(row.get('model'))} {clean(row.get('series'))} {clean(row.get('package'))} {clean(row.get('style'))}. "
-                f"Engine: {clean(row.get('engine'))}. "
-                f"Ratings - GRG: {row.get('grg')}, DRG: {row.get('drg')}."
-            )
-            documents.append(semantic_text)
-            if row.get('make') == 'RIVIAN':
-                print(row)
-            # Store metadata with lowercase keys
-            metadatas.append({
-                "year": int(row.get('year', 0)),
-                "make": clean(row.get('make')),
-                "model": clean(row.get('model')),
-                "series": clean(row.get('series')),
-                "package": clean(row.get('package')),
-                "style": clean(row.get('style')),
-                "engine": clean(row.get('engine')),
-                "grg": row.get('grg', 0),
-                "drg": row.get('drg', 0),
-                "vsd": row.get('vsd', 0),
-                "lrg": row.get('lrg', 0),
-                "expiration": int(row.get('expiration', 0))
-            })
-            ids.append(f"csv_{idx}") # Create a unique ID for CSV rows
-            
-        # Batch Insertion
-        BATCH_SIZE = 2000
-        total_docs = len(documents)
-        
-        print(f"Starting batch insertion (Batch Size: {BATCH_SIZE})...")
-        
-        for i in range(0, total_docs, BATCH_SIZE):
-            end_idx = min(i + BATCH_SIZE, total_docs)
-            collection.add(
-                documents=documents[i:end_idx],
-                metadatas=metadatas[i:end_idx],
-                ids=ids[i:end_idx]
-            )
-            print(f"  - Indexed {end_idx}/{total_docs}")
-            
+        print(f"  - Indexed {total_docs}")
         print("CSV Indexing Complete.")
 
+    def _prepare_batch(self, df):
+        """Builds (documents, metadatas, ids) for one chunk of CSV rows."""
+        # Vectorized column cleaning (same result as the old per-row clean(): stripped string, or "N/A" if missing)
+        for col in TEXT_COLUMNS:
+            values = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+            df[col] = values.astype(str).str.strip().where(values.notna(), "N/A")
+        for col in ('year', 'grg', 'drg', 'vsd', 'lrg', 'expiration'):
+            if col not in df.columns:
+                df[col] = 0
+
+        if _DEBUG_MAKE:
+            matches = df[df['make'] == _DEBUG_MAKE]
+            if not matches.empty:
+                print(matches)
+
+        # Create semantic strings
+        documents = (
+            df['year'].astype(str) + ' ' + df['make'] + ' ' + df['model'] + ' ' + df['series'] + ' '
+            + df['package'] + ' ' + df['style'] + '. Engine: ' + df['engine'] + '. '
+            + 'Ratings - GRG: ' + df['grg'].astype(str) + ', DRG: ' + df['drg'].astype(str) + '.'
+        ).tolist()
+
+        # Store metadata with lowercase keys
+        for col in ('year', 'grg', 'expiration'):
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(np.int32)
+        add_token_columns(df)
+        metadatas = df[list(METADATA_COLUMNS) + [f'{field}_tokens' for field in TOKEN_FIELDS]].to_dict(orient='records')
+        # Content-addressed ids: re-running the indexer on the same CSV finds every row already present
+        ids = [_content_id(document, metadata) for document, metadata in zip(documents, metadatas)]
+        return documents, metadatas, ids
+
 # --- EXECUTION ---
 if __name__ == "__main__":
     RATINGS_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../Data/California/STATEFARM_CA_Insurance__tables/car_factors/vehicle_ratings_groups - Sheet1.csv"))
@@ -1,5 +1,29 @@
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pymongo import MongoClient 
+from app.services.vector_databases.vehicle_vector_utils import add_deduplicated, add_token_columns
+
+BATCH_SIZE = 2000
+
+# UPPERCASE MongoDB field -> lowercase Chroma metadata key
+MONGO_FIELD_MAP = {
+    'YEAR': 'year',
+    'MAKE': 'make',
+    'MODEL': 'model',
+    'SERIES': 'series',
+    'OPTIONPACKAGE': 'package',
+    'BODYSTYLE': 'style',
+    'ENGINE': 'engine',
+    'GRG': 'grg',
+    'DRG': 'drg',
+    'VSD': 'vsd',
+    'LRG': 'lrg',
+    'EXPIRATION': 'expiration',
+}
+# Server-side projection: only the fields we index
+MONGO_PROJECTION = {**{field: 1 for field in MONGO_FIELD_MAP}, '_id': 1}
 
 class MongoDataLoader():
     """Loads vehicle data from a MongoDB database."""
@@ -10,71 +34,74 @@ class MongoDataLoader():
         self.collection_name = collection_name
         self.mongo_client = None
 
-    def index_data(self, collection):
+    def index_data(self, collection, embedding_function=None):
         """
         Connects to MongoDB, reads the data, and saves to ChromaDB in BATCHES.
         Reads UPPERCASE keys from Mongo, saves as lowercase keys in Chroma.
+        Streams the cursor: each batch is transformed while the previous one is being added,
+        so only about two batches are held in memory at a time.
+        embedding_function: the collection's embedding function, so each distinct document is embedded once.
         """
         try:
             self.mongo_client = MongoClient(self.mongo_uri)
             db = self.mongo_client[self.db_name]
             mongo_coll = db[self.collection_name]
-            cursor = mongo_coll.find()
-            total_docs = mongo_coll.count_documents({})
-            print(f"Found {total_docs} documents in MongoDB. Preparing for indexing...")
+            cursor = mongo_coll.find({}, projection=MONGO_PROJECTION).batch_size(BATCH_SIZE)
+            print("Reading documents from MongoDB for indexing...")
 
         except Exception as e:
             if self.mongo_client:
                 self.mongo_client.close()
             raise ConnectionError(f"Could not connect to or read from MongoDB: {e}")
 
-        
-        documents = []
-        metadatas = []
-        ids = []
-        
-        for row in cursor:
-            def clean(val): return str(val).strip() if pd.notna(val) else "N/A"
-
-            # --- UPDATED: Read ALL UPPERCASE keys from MongoDB ---
-            semantic_text = (
-                f"{clean(row.get('YEAR'))} {clean(row.get('MAKE'))} {clean(row.get('MODEL'))} "
-                f"{clean(row.get('SERIES'))} {clean(row.get('OPTIONPACKAGE'))} {clean(row.get('BODYSTYLE'))}. "
-                f"Engine: {clean(row.get('ENGINE'))}. "
-                f"Ratings - GRG: {clean(row.get('GRG'))}, DRG: {clean(row.get('DRG'))}, "
-                f"VSD: {clean(row.get('VSD'))}, LRG: {clean(row.get('LRG'))}."
-            )
-            documents.append(semantic_text)
-            
-            # --- UPDATED: Store all metadata with lowercase keys ---
-            metadatas.append({
-                "year": int(row.get('YEAR', 0)),
-                "make": clean(row.get('MAKE')),
-                "model": clean(row.get('MODEL')),
-                "series": clean(row.get('SERIES')),
-                "package": clean(row.get('OPTIONPACKAGE')), # Maps from OPTIONPACKAGE
-                "style": clean(row.get('BODYSTYLE')),     # Maps from BODYSTYLE
-                "engine": clean(row.get('ENGINE')),
-                "grg": clean(row.get('GRG')), # Keep as string/int based on data
-                "drg": clean(row.get('DRG')),
-                "vsd": clean(row.get('VSD')),
-                "lrg": clean(row.get('LRG')),
-                "expiration": clean(row.get('EXPIRATION'))
-            })
-            ids.append(str(row['_id']))
-            
-        # Batch Insertion
-        BATCH_SIZE = 2000
         print(f"Starting batch insertion (Batch Size: {BATCH_SIZE})...")
-        
-        for i in range(0, total_docs, BATCH_SIZE):
-            end_idx = min(i + BATCH_SIZE, total_docs)
-            collection.add(
-                documents=documents[i:end_idx],
-                metadatas=metadatas[i:end_idx],
-                ids=ids[i:end_idx]
-            )
-            print(f"  - Indexed {end_idx}/{total_docs}")
-            
+        total_docs = 0
+        try:
+            # One writer thread: adds stay sequential, but overlap with reading/transforming the next batch
+            with ThreadPoolExecutor(max_workers=1) as writer:
+                pending = None
+                while True:
+                    rows = list(islice(cursor, BATCH_SIZE))
+                    if not rows:
+                        break
+                    documents, metadatas, ids = self._prepare_batch(rows)
+                    if pending is not None:
+                        pending.result()  # Re-raises a failed add
+                        print(f"  - Indexed {total_docs}")
+                    pending = writer.submit(add_deduplicated, collection, documents, metadatas, ids, embedding_function)
+                    total_docs += len(ids)
+                if pending is not None:
+                    pending.result()
+        finally:
+            self.mongo_client.close()
+
+        print(f"  - Indexed {total_docs}")
         print("MongoDB Indexing Complete.")
-        self.mongo_client.close()
\ No newline at end of file
+
+    def _prepare_batch(self, rows):
+        """Builds (documents, metadatas, ids) for one batch of MongoDB documents."""
+        # dtype=object keeps ints as ints when some documents lack a field (no float upcast)
+        df = pd.DataFrame(rows, dtype=object)
+        # Reads UPPERCASE keys from Mongo; columns are renamed to the lowercase Chroma keys
+        df = df.reindex(columns=['_id', *MONGO_FIELD_MAP]).rename(columns=MONGO_FIELD_MAP)
+        # Vectorized clean(): stripped string, or "N/A" if missing
+        cleaned = {
+            col: df[col].astype(str).str.strip().where(df[col].notna(), "N/A")
+            for col in MONGO_FIELD_MAP.values()
+        }
+
+        documents = (
+            cleaned['year'] + ' ' + cleaned['make'] + ' ' + cleaned['model'] + ' '
+            + cleaned['series'] + ' ' + cleaned['package'] + ' ' + cleaned['style'] + '. '
+            + 'Engine: ' + cleaned['engine'] + '. '
+            + 'Ratings - GRG: ' + cleaned['grg'] + ', DRG: ' + cleaned['drg'] + ', '
+            + 'VSD: ' + cleaned['vsd'] + ', LRG: ' + cleaned['lrg'] + '.'
+        ).tolist()
+
+        # Store all metadata with lowercase keys; year as int, everything else as cleaned strings
+        metadata_df = pd.DataFrame(cleaned)
+        metadata_df['year'] = pd.to_numeric(df['year'], errors='coerce').fillna(0).astype(np.int32)
+        add_token_columns(metadata_df)
+        metadatas = metadata_df.to_dict(orient='records')
+        ids = df['_id'].astype(str).tolist()
+        return documents, metadatas, ids
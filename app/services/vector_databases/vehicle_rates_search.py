@@ -1,19 +1,60 @@
 import os
-import pandas as pd
+# --- Process-wide torch threading (applies to every torch user once this module is imported) ---
+# One intra-op thread per inference call: concurrent requests each get a core instead of
+# oversubscribing them. OMP_NUM_THREADS must be set before torch is imported; an explicit
+# value in the environment still wins, for both OpenMP and torch's intra-op pool.
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+import torch
+torch.set_num_threads(int(os.environ['OMP_NUM_THREADS']))
+
+import numpy as np
 import chromadb
-import shutil
-import time
 import ast
+import heapq
 import re
-from chromadb.utils import embedding_functions
-from typing import Optional
+import threading
+from collections import OrderedDict
+from functools import cache, lru_cache
 from abc import ABC, abstractmethod 
+from app.services.vector_databases.vehicle_vector_utils import (
+    TOKEN_FIELDS, BatchedSentenceTransformer, add_deduplicated, candidate_tokens, jaccard_scores, tokenize_model
+)
+
+# A flat {...} vehicle dict embedded in a boosting prompt
+_BOOST_DICT_RE = re.compile(r"\{[^{}]*\}", re.DOTALL)
+
+# Texts per SentenceTransformer forward pass (Chroma's embedding function uses encode's default of 32)
+EMBEDDING_BATCH_SIZE = 128
+# Rows per collection.add in bulk_add
+BULK_ADD_CHUNK_SIZE = 1000
+
+# Shared by every VehicleRatesVectorDB so the model is loaded once per process
+_EMB_FN_SINGLETON = None
+
+def _get_embedding_function():
+    """Returns the process-wide SentenceTransformer embedding function, creating it on first use."""
+    global _EMB_FN_SINGLETON
+    if _EMB_FN_SINGLETON is None:
+        _EMB_FN_SINGLETON = BatchedSentenceTransformer(
+            model_name="all-MiniLM-L6-v2",
+            device="cpu",
+            batch_size=EMBEDDING_BATCH_SIZE
+        )
+    return _EMB_FN_SINGLETON
+
+# (id(embedding function), query text) -> embedding, least recently used first
+_QUERY_EMBEDDINGS = OrderedDict()
+_QUERY_EMBEDDINGS_LOCK = threading.Lock()
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=256)
+def _parse_boost_dict(dict_str):
+    """ast.literal_eval of an embedded vehicle dict, cached for repeated prompts (treat the result as read-only)."""
+    return ast.literal_eval(dict_str)
 
-# Define "junk" words that don't help identify a model
-MODEL_STOP_WORDS = {
-    'class', 'series', 'sedan', 'suv', 'coupe', 'ev', 'hybrid', 
-    'benz', 'na', 'n', 'a' # 'na', 'n', 'a' handle 'N/A' after tokenizing
-}
+# Chroma fetch width for boosted searches; strict-model searches start at top_k * STRICT_FETCH_FACTOR
+WIDE_FETCH = 50
+STRICT_FETCH_FACTOR = 3
 
 # -------------------------------------------------
 # 1. ABSTRACT LOADER INTERFACE
@@ -24,13 +65,17 @@ class IDataLoader(ABC):
     must implement the index_data method.
     """
     @abstractmethod
-    def index_data(self, collection):
+    def index_data(self, collection, embedding_function=None):
         """
         This method should read from a data source (file, db, api)
         and add the data to the provided ChromaDB collection.
+        embedding_function is the collection's embedding function (e.g. VehicleRatesVectorDB.emb_fn),
+        used to embed each distinct document once.
         It must save metadata with lowercase keys:
         'year', 'make', 'model', 'series', 'package', 'style', 'engine', 
         'grg', 'drg', 'vsd', 'lrg', 'expiration'
+        and should also save '<field>_tokens' (the space-joined tokenizer output)
+        for each of TOKEN_FIELDS, so reranking does not tokenize at query time.
         """
         pass
 
@@ -47,42 +92,78 @@ class VehicleRatesVectorDB:
         # 2. Connect to local persistent storage
         self.client = chromadb.PersistentClient(path=db_folder)
         
-        # 3. Define the embedding model
-        self.emb_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
-        )
+        # 3. Define the embedding model (shared across instances)
+        self.emb_fn = _get_embedding_function()
         
         # 4. Get or Create the Collection
         self.collection = self.client.get_or_create_collection(
             name="vehicle_ratings_v1",
             embedding_function=self.emb_fn
         )
+
+        # Chroma id -> {field: token frozenset}, filled as candidates are first seen
+        self._candidate_tokens = {}
     
     def _tokenize_model(self, model_name):
+        """Tokenizes a model/trim name (see vehicle_vector_utils.tokenize_model, which is cached)."""
+        return tokenize_model(model_name)
+
+    def bulk_add(self, documents, metadatas, ids):
         """
-        Helper to robustly tokenize model/trim names and remove stop words.
-        Splits letters from numbers (e.g., 'EQB300' -> 'eqb 300').
+        Adds rows in BULK_ADD_CHUNK_SIZE chunks. Rows already in the collection are skipped and each
+        distinct document is embedded once, in EMBEDDING_BATCH_SIZE encode batches.
         """
-        s = str(model_name) # Handle potential int/digits
-        # Insert space between letters and numbers
-        s = re.sub(r'([a-zA-Z])([0-9])', r'\1 \2', s)
-        s = re.sub(r'([0-9])([a-zA-Z])', r'\1 \2', s)
-        
-        # Replace hyphens/slashes with spaces, strip non-alphanumeric, lowercase
-        tokens = re.sub(r'[^a-z0-9\s]+', '', s.lower().replace('-', ' '))
-        
-        # Split by space, filter out empty tokens and stop words
-        return set(filter(lambda t: t and t not in MODEL_STOP_WORDS, tokens.split()))
+        for start in range(0, len(ids), BULK_ADD_CHUNK_SIZE):
+            end = start + BULK_ADD_CHUNK_SIZE
+            add_deduplicated(
+                self.collection, documents[start:end], metadatas[start:end], ids[start:end],
+                embedding_function=self.emb_fn
+            )
+
+    def _embed_queries(self, texts):
+        """
+        Embeddings for the query texts, served from a process-wide LRU cache.
+        Texts not seen before are embedded together in one call.
+        """
+        fn_id = id(self.emb_fn)
+        unique_texts = list(dict.fromkeys(texts))
+        vectors = {}
+        with _QUERY_EMBEDDINGS_LOCK:
+            for text in unique_texts:
+                key = (fn_id, text)
+                if key in _QUERY_EMBEDDINGS:
+                    _QUERY_EMBEDDINGS.move_to_end(key)
+                    vectors[text] = _QUERY_EMBEDDINGS[key]
+
+        missing = [text for text in unique_texts if text not in vectors]
+        if missing:
+            computed = dict(zip(missing, self.emb_fn(missing)))
+            vectors.update(computed)
+            with _QUERY_EMBEDDINGS_LOCK:
+                for text, embedding in computed.items():
+                    _QUERY_EMBEDDINGS[(fn_id, text)] = embedding
+                while len(_QUERY_EMBEDDINGS) > QUERY_EMBEDDING_CACHE_SIZE:
+                    _QUERY_EMBEDDINGS.popitem(last=False)
+        return [vectors[text] for text in texts]
+
+    def _candidate_token_sets(self, candidate_id, meta):
+        """
+        Token sets of a candidate's TOKEN_FIELDS, cached per Chroma id.
+        Read from the precomputed '<field>_tokens' metadata; tokenized only for rows indexed without it.
+        """
+        token_sets = self._candidate_tokens.get(candidate_id)
+        if token_sets is None:
+            token_sets = {field: candidate_tokens(meta, field) for field in TOKEN_FIELDS}
+            self._candidate_tokens[candidate_id] = token_sets
+        return token_sets
 
     def _jaccard_similarity(self, set_a, set_b):
-        """Calculates Jaccard similarity between two sets."""
-        if not set_a and not set_b:
+        """Calculates Jaccard similarity between two sets (union size derived, not built)."""
+        if not set_a or not set_b:
             return 0.0
-        intersection = set_a.intersection(set_b)
-        union = set_a.union(set_b)
-        if not union:
-             return 0.0
-        return len(intersection) / len(union)
+        intersection = len(set_a & set_b)
+        union = len(set_a) + len(set_b) - intersection
+        return intersection / union if union else 0.0
 
     def search_with_boosting(self, query_text, boost_targets, weights, top_k=5, where=None, strict_model_match=None):
         """
@@ -90,100 +171,117 @@ class VehicleRatesVectorDB:
         Boosts: Make, Model, Year, Trim (vs series/package), Style, Engine
         Supports strict filtering via 'where' (Chroma) and 'strict_model_match' (Post-filter).
         """
-        results = self.collection.query(
-            query_texts=[query_text],
-            n_results=50, # Fetch wide
-            where=where
-        )
-        
+        return self._search_group([query_text], [boost_targets], weights, top_k, where, [strict_model_match])[0]
+
+    def _search_group(self, queries, boost_targets_list, weights, top_k, where, strict_model_matches):
+        """
+        Boosted search for queries sharing one 'where' clause, in one Chroma call.
+        When every query has a strict_model_match, candidates are fetched narrow (top_k * STRICT_FETCH_FACTOR);
+        queries left with fewer than top_k survivors are re-fetched wide (WIDE_FETCH).
+        """
+        reranked = [None] * len(queries)
+        pending = list(range(len(queries)))
+        n_results = top_k * STRICT_FETCH_FACTOR if all(strict_model_matches) else WIDE_FETCH
+        while pending:
+            results = self.collection.query(
+                query_embeddings=self._embed_queries([queries[i] for i in pending]),
+                n_results=min(n_results, WIDE_FETCH),
+                where=where
+            )
+            widen = []
+            for q, i in enumerate(pending):
+                reranked[i] = self._rerank(results, q, boost_targets_list[i], weights, top_k, strict_model_matches[i])
+                if len(reranked[i]) < top_k and n_results < WIDE_FETCH:
+                    widen.append(i)
+            pending = widen
+            n_results = WIDE_FETCH
+        return reranked
+
+    def _rerank(self, results, q, boost_targets, weights, top_k=5, strict_model_match=None):
+        """Boosts and re-ranks the candidates of query number q in a Chroma query result."""
         reranked_candidates = []
         
-        if results['ids'] and len(results['ids']) > 0:
-            # Pre-tokenize targets
-            target_make_tokens = self._tokenize_model(boost_targets.get('make', ''))
-            target_model_tokens = self._tokenize_model(boost_targets.get('model', ''))
-            target_trim_tokens = self._tokenize_model(boost_targets.get('trim', ''))
-            target_style_tokens = self._tokenize_model(boost_targets.get('style', ''))
-            target_engine_tokens = self._tokenize_model(boost_targets.get('engine', ''))
-            
-            for i in range(len(results['ids'][0])):
-                meta = results['metadatas'][0][i]
-                original_dist = results['distances'][0][i]
-                new_score = original_dist
-                
-                # A. Make Boost (Proportional Jaccard Similarity)
-                candidate_make_tokens = self._tokenize_model(meta.get('make', ''))
-                jaccard_score_make = self._jaccard_similarity(target_make_tokens, candidate_make_tokens)
-                new_score -= (weights.get('make', 0.0) * jaccard_score_make)
-                    
-                # B. Model Boost (Proportional Jaccard Similarity)
-                candidate_model_tokens = self._tokenize_model(meta.get('model', ''))
-                jaccard_score_model = self._jaccard_similarity(target_model_tokens, candidate_model_tokens)
-                new_score -= (weights.get('model', 0.0) * jaccard_score_model)
-
-                # C. Year Boost (Numerical)
-                target_year = int(boost_targets.get('year', 0))
-                candidate_year = int(meta.get('year', 0))
-                if target_year > 0:
-                    if candidate_year == target_year:
-                        new_score -= weights.get('year', 0.0)
-                    elif abs(candidate_year - target_year) <= 2:
-                        new_score -= (weights.get('year', 0.0) / 2)
-
-                # D. Flexible Trim Boost (Proportional Jaccard Similarity)
-                # Checks trim against series and package
-                candidate_series_tokens = self._tokenize_model(meta.get('series', ''))
-                candidate_package_tokens = self._tokenize_model(meta.get('package', ''))
-                
-                score_series = self._jaccard_similarity(target_trim_tokens, candidate_series_tokens)
-                score_package = self._jaccard_similarity(target_trim_tokens, candidate_package_tokens)
-                
-                best_trim_score = max(score_series, score_package)
-                new_score -= (weights.get('trim', 0.0) * best_trim_score)
-
-                # E. Style Boost (Proportional Jaccard Similarity)
-                candidate_style_tokens = self._tokenize_model(meta.get('style', ''))
-                jaccard_score_style = self._jaccard_similarity(target_style_tokens, candidate_style_tokens)
-                new_score -= (weights.get('style', 0.0) * jaccard_score_style)
-                
-                # F. Engine Boost (Proportional Jaccard Similarity)
-                candidate_engine_tokens = self._tokenize_model(meta.get('engine', ''))
-                jaccard_score_engine = self._jaccard_similarity(target_engine_tokens, candidate_engine_tokens)
-                new_score -= (weights.get('engine', 0.0) * jaccard_score_engine)
-
-                # STRICT MODEL FILTERING
-                # If strict_model_match is set, only keep candidates where the model name matches significantly
-                keep_candidate = True
-                if strict_model_match:
-                    target_model_tokens_strict = self._tokenize_model(strict_model_match)
-                    # Require that ALL tokens in the target model are present in the candidate
-                    # This prevents "R1S" matching "R1T" (where 's' is missing from 'R1T')
-                    if not target_model_tokens_strict.issubset(candidate_model_tokens):
-                         keep_candidate = False
-                
-                if keep_candidate:
-                    canddidate = {
-                        "Vehicle Info": results['documents'][0][i],
-                        "year": boost_targets.get('year', meta.get('year')),
-                        "make": meta.get('make'),
-                        "model": meta.get('model'),
-                        "grg": meta.get('grg', 'N/A'),
-                        "drg": meta.get('drg', 'N/A'),
-                        "vsd": meta.get('vsd', 'N/A'),
-                        "lrg": meta.get('lrg', 'N/A'),
-                        "Match Distance": round(new_score, 4)
-                    }
-                    if meta.get('series'):
-                        canddidate['series'] = meta.get('series')
-                    if meta.get('package'):
-                        canddidate['package'] = meta.get('package')
-                    if meta.get('style'):
-                        canddidate['style'] = meta.get('style')
-                    if meta.get('engine'):
-                        canddidate['engine'] = meta.get('engine')
-                    reranked_candidates.append(canddidate) 
-        reranked_candidates.sort(key=lambda x: x['Match Distance'])
-        return reranked_candidates[:top_k]
+        if results['ids'] and len(results['ids'][q]) > 0:
+            ids = results['ids'][q]
+            all_candidate_tokens = [self._candidate_token_sets(ids[i], meta) for i, meta in enumerate(results['metadatas'][q])]
+
+            # STRICT MODEL FILTERING (first, so only survivors are scored)
+            # If strict_model_match is set, only keep candidates where the model name matches significantly
+            kept = list(range(len(ids)))
+            if strict_model_match:
+                target_model_tokens_strict = tokenize_model(strict_model_match)
+                # Require that ALL tokens in the target model are present in the candidate
+                # This prevents "R1S" matching "R1T" (where 's' is missing from 'R1T')
+                kept = [i for i in kept if target_model_tokens_strict.issubset(all_candidate_tokens[i]['model'])]
+                if not kept:
+                    return reranked_candidates
+
+            metadatas = [results['metadatas'][q][i] for i in kept]
+            candidate_tokens = [all_candidate_tokens[i] for i in kept]
+            new_scores = np.asarray(results['distances'][q], dtype=float)[kept]
+
+            def field_scores(target_tokens, field):
+                """Jaccard of the target's tokens against every surviving candidate's `field` tokens."""
+                return jaccard_scores(target_tokens, [tokens[field] for tokens in candidate_tokens])
+
+            def field_boost(weight_key, field):
+                """Weighted Jaccard boost; skipped (0) when the weight is zero or the target has no tokens."""
+                weight = weights.get(weight_key, 0.0)
+                target_tokens = tokenize_model(boost_targets.get(weight_key, '')) if weight else None
+                if not target_tokens:
+                    return 0.0
+                return weight * field_scores(target_tokens, field)
+
+            # A/B. Make & Model Boost (Proportional Jaccard Similarity)
+            new_scores -= field_boost('make', 'make')
+            new_scores -= field_boost('model', 'model')
+
+            # C. Year Boost (Numerical)
+            target_year = int(boost_targets.get('year', 0))
+            if target_year > 0:
+                candidate_years = np.array([int(meta.get('year', 0)) for meta in metadatas])
+                year_gap = np.abs(candidate_years - target_year)
+                new_scores -= np.where(year_gap == 0, weights.get('year', 0.0),
+                                       np.where(year_gap <= 2, weights.get('year', 0.0) / 2, 0.0))
+
+            # D. Flexible Trim Boost (Proportional Jaccard Similarity)
+            # Checks trim against series and package
+            trim_weight = weights.get('trim', 0.0)
+            target_trim_tokens = tokenize_model(boost_targets.get('trim', '')) if trim_weight else None
+            if target_trim_tokens:
+                new_scores -= trim_weight * np.maximum(field_scores(target_trim_tokens, 'series'),
+                                                       field_scores(target_trim_tokens, 'package'))
+
+            # E/F. Style & Engine Boost (Proportional Jaccard Similarity)
+            new_scores -= field_boost('style', 'style')
+            new_scores -= field_boost('engine', 'engine')
+
+            # Select the top_k on the rounded score (ties keep Chroma order, as a stable sort would)
+            # and only build result dicts for those
+            rounded_scores = [round(float(score), 4) for score in new_scores]
+            for j in heapq.nsmallest(top_k, range(len(kept)), key=rounded_scores.__getitem__):
+                meta = metadatas[j]
+                canddidate = {
+                    "Vehicle Info": results['documents'][q][kept[j]],
+                    "year": boost_targets.get('year', meta.get('year')),
+                    "make": meta.get('make'),
+                    "model": meta.get('model'),
+                    "grg": meta.get('grg', 'N/A'),
+                    "drg": meta.get('drg', 'N/A'),
+                    "vsd": meta.get('vsd', 'N/A'),
+                    "lrg": meta.get('lrg', 'N/A'),
+                    "Match Distance": rounded_scores[j]
+                }
+                if meta.get('series'):
+                    canddidate['series'] = meta.get('series')
+                if meta.get('package'):
+                    canddidate['package'] = meta.get('package')
+                if meta.get('style'):
+                    canddidate['style'] = meta.get('style')
+                if meta.get('engine'):
+                    canddidate['engine'] = meta.get('engine')
+                reranked_candidates.append(canddidate) 
+        return reranked_candidates
 
     def search_by_text(self, query_text, top_k=5, boost_weights=None):
         """
@@ -192,10 +290,10 @@ class VehicleRatesVectorDB:
         """
         if "should be boosted" in query_text:
             try:
-                match = re.search(r"\{.*\}", query_text)
+                match = _BOOST_DICT_RE.search(query_text)
                 if match:
                     dict_str = match.group(0)
-                    vehicle_dict = ast.literal_eval(dict_str)
+                    vehicle_dict = _parse_boost_dict(dict_str)
                     
                     boost_targets = {}
                     if 'modelYear' in vehicle_dict: boost_targets['year'] = int(vehicle_dict['modelYear'])
@@ -227,7 +325,7 @@ class VehicleRatesVectorDB:
                 print(f"[Warning] Boosting parsing failed: {e}. Proceeding with standard search.")
 
         results = self.collection.query(
-            query_texts=[query_text],
+            query_embeddings=self._embed_queries([query_text]),
             n_results=top_k
         )
         return self._format_results(results)
@@ -236,6 +334,53 @@ class VehicleRatesVectorDB:
         """
         Searches the DB based on a VIN data dictionary.
         """
+        return self.search_by_vin_data_batch([vin_data], boosting, boost_weights)[0]
+
+    def search_by_vin_data_batch(self, vin_data_list, boosting=True, boost_weights=None):
+        """
+        Searches the DB for several VIN data dictionaries, returning one result list per vehicle.
+        Queries sharing the same make filter go to Chroma in a single collection.query call,
+        so their embeddings and HNSW searches are batched.
+        """
+        searches = [self._vin_search(vin_data) for vin_data in vin_data_list]
+        
+        if not boosting:
+            for query, _ in searches:
+                print(f"\nUsing Search Query: '{query}' (boosting disabled)")
+            if not searches:
+                return []
+            results = self.collection.query(
+                query_embeddings=self._embed_queries([query for query, _ in searches]),
+                n_results=5
+            )
+            return [self._format_results(results, q) for q in range(len(searches))]
+
+        weights = boost_weights if boost_weights is not None else {'make': 1.0, 'model': 2.0, 'year': 1.0, 'trim': 1.5, 'style': 0.1, 'engine': 0.5} 
+
+        # Use strict filtering for Make and Model: one Chroma query per distinct make
+        by_make = {}
+        for position, (query, boost_targets) in enumerate(searches):
+            print(f"\nUsing Search Query: '{query}' (with boosting: {weights})")
+            by_make.setdefault(boost_targets['make'], []).append(position)
+
+        reranked = [None] * len(searches)
+        for make, positions in by_make.items():
+            where_clause = {"make": make} if make else None
+            group_targets = [searches[position][1] for position in positions]
+            group_results = self._search_group(
+                [searches[position][0] for position in positions],
+                group_targets,
+                weights,
+                5,
+                where_clause,
+                [boost_targets['model'] for boost_targets in group_targets]
+            )
+            for position, hits in zip(positions, group_results):
+                reranked[position] = hits
+        return reranked
+
+    def _vin_search(self, vin_data):
+        """Builds the semantic query and boost targets for one VIN data dictionary."""
         year_str = str(vin_data.get('year', ''))
         make = vin_data.get('make', '')
         model = vin_data.get('model', '')
@@ -244,67 +389,30 @@ class VehicleRatesVectorDB:
         engine = vin_data.get('engine', '') # Get engine
         doors = vin_data.get('doors', '') # Get engine
 
-        query = f"""
-                Find me exact or similar vehicles like this year {year_str} make {make} model {model} style {style} trim {trim} engine {engine} doors {doors},  
-                make sure both make and model match ,
-                if there is a different make or model, if both do not match your critierie then ignore
-        """
+        # Concise, embedding-friendly query: just the key fields. Make is enforced by the 'where' filter
+        # and strict model matching, so instructions in the text would only dilute the vector.
+        query = " ".join(str(value) for value in (year_str, make, model, trim, style, engine) if value)
         
-        if boosting:
-            boost_targets = {
-                'year': int(year_str) if year_str.isdigit() else 0,
-                'make': make,
-                'model': model,
-                'trim': trim,
-                'style': style,
-                'engine': engine,
-                'doors': doors
-            }
-            weights = boost_weights if boost_weights is not None else {'make': 1.0, 'model': 2.0, 'year': 1.0, 'trim': 1.5, 'style': 0.1, 'engine': 0.5} 
-
-            print(f"\nUsing Search Query: '{query}' (with boosting: {weights})")
-            
-            # Use strict filtering for Make and Model
-            where_clause = {"make": make} if make else None
-            
-            return self.search_with_boosting(
-                query, 
-                boost_targets, 
-                weights, 
-                where=where_clause,
-                strict_model_match=model
-            )
-        else:
-            print(f"\nUsing Search Query: '{query}' (boosting disabled)")
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=5
-            )
-            return self._format_results(results)
+        boost_targets = {
+            'year': int(year_str) if year_str.isdigit() else 0,
+            'make': make,
+            'model': model,
+            'trim': trim,
+            'style': style,
+            'engine': engine,
+            'doors': doors
+        }
+        return query, boost_targets
 
-    def _format_results(self, results):
+    def _format_results(self, results, q=0):
         """
-        Converts raw Chroma query results (a dict) or a boosted DataFrame
-        to a clean, consistent DataFrame.
+        Converts raw Chroma query results (a dict) for query number q
+        to a list of clean, consistent hit dicts.
         """
-        # Define all columns we want to see
-        all_cols = [
-            "Vehicle Info", "Year", "Make", "Model", "series", "package", 
-            "style", "engine", "Match Distance","drg","grg","vsd","lrg"
-        ]
-        
-        # Handle if results are already a DataFrame (from boosting)
-        # if isinstance(results, pd.DataFrame):
-        #     for col in all_cols:
-        #         if col not in results.columns:
-        #             results[col] = "N/A" # Add missing columns
-        #     return results[all_cols]
-            
-        # Handle raw Chroma dict results
         hits = []
         if results['ids'] and len(results['ids']) > 0:
-            for i in range(len(results['ids'][0])):
-                meta = results['metadatas'][0][i]
+            for i in range(len(results['ids'][q])):
+                meta = results['metadatas'][q][i]
                 hits.append({ 
                     "year": meta.get('year'),
                     "make": meta.get('make'),
@@ -317,14 +425,8 @@ class VehicleRatesVectorDB:
                     "drg": meta.get('drg', 'N/A'),
                     "vsd": meta.get('vsd', 'N/A'),
                     "lrg": meta.get('lrg', 'N/A'),
-                    "Match Distance": round(results['distances'][0][i], 4)
+                    "Match Distance": round(results['distances'][q][i], 4)
                 })
-        
-        # final_df = pd.DataFrame(hits)
-        # # Ensure final DataFrame has all columns
-        # for col in all_cols:
-        #     if col not in final_df.columns:
-        #         final_df[col] = "N/A"
         return hits
 
 # --- EXECUTION ---
@@ -350,7 +452,7 @@ def test_vehicle_rates():
       "primaryUse": "Other Use",
       "annualMiles": "13,000"}
 
-    FIELDS_TO_DISPLAY = ['Year', 'Make', 'Model', 'series','package', 'style', 'engine', 'Match Distance','grg','drg','vsd','lrg'] 
+    FIELDS_TO_DISPLAY = ['year', 'make', 'model', 'series','package', 'style', 'engine', 'Match Distance','grg','drg','vsd','lrg'] 
     SCORING_RECOMMENDATIONS = " Match with Year Make Model should be boosted when scoring"
 
     MONGO_CONNECTION_URI = "mongodb://localhost:27017/" # Or your Atlas string
@@ -370,8 +472,9 @@ def test_vehicle_rates():
     
     print("\n---  Test 1: VIN Data Match Mercedes EQB-Class (Boosted) ---")
     results1 = rates_app.search_by_vin_data(MERCEDES_EQB_2023, boosting=True,boost_weights=custom_weights_vin)
-    if not results1.empty:
-        print(results1[FIELDS_TO_DISPLAY])
+    if results1:
+        for hit in results1:
+            print({field: hit.get(field) for field in FIELDS_TO_DISPLAY})
     else:
         print("No matches found.")
         
@@ -389,8 +492,9 @@ def test_vehicle_rates():
 
     print(f"RIVIAN Using custom weights: {custom_weights_vin}")
     resultsRivian = rates_app.search_by_vin_data(RIVIAN_R1S_2025, boosting=True, boost_weights=custom_weights_vin)
-    if not resultsRivian.empty:
-        print(resultsRivian[FIELDS_TO_DISPLAY])
+    if resultsRivian:
+        for hit in resultsRivian:
+            print({field: hit.get(field) for field in FIELDS_TO_DISPLAY})
     else:
         print("No matches found.")
   
@@ -403,33 +507,29 @@ def test_vehicle_rates():
 # 3. SINGLETON INSTANCE & ACCESSORS
 # -------------------------------------------------
 
-_vehicle_rates_db_instance: Optional['VehicleRatesVectorDB'] = None
+_VEHICLE_RATES_DB_LOCK = threading.Lock()
 
-def initialize_vehicle_rates_db(db_folder: str = "./vehicle_rates_rag") -> None:
+@cache
+def _create_vehicle_rates_db(db_folder: str) -> 'VehicleRatesVectorDB':
+    print("Global VehicleRatesVectorDB initialized.")
+    return VehicleRatesVectorDB(db_folder=db_folder)
+
+@cache
+def get_vehicle_rates_db(db_folder: str = "./vehicle_rates_rag") -> 'VehicleRatesVectorDB':
     """
-    Initialize the global VehicleRatesVectorDB instance.
-    Should be called once at application startup.
+    Get the shared VehicleRatesVectorDB instance for db_folder.
+    Cache hits skip the lock entirely; the first call per folder takes the
+    lock so concurrent workers construct the DB (and load SBERT) only once.
     """
-    global _vehicle_rates_db_instance
-    if _vehicle_rates_db_instance is None:
-        _vehicle_rates_db_instance = VehicleRatesVectorDB(db_folder=db_folder)
-        print("Global VehicleRatesVectorDB initialized.")
-    else:
-        print("Global VehicleRatesVectorDB already initialized.")
+    with _VEHICLE_RATES_DB_LOCK:
+        return _create_vehicle_rates_db(db_folder)
 
-def get_vehicle_rates_db() -> 'VehicleRatesVectorDB':
+def initialize_vehicle_rates_db(db_folder: str = "./vehicle_rates_rag") -> None:
     """
-    Get the global VehicleRatesVectorDB instance.
-    Raises RuntimeError if not initialized.
+    Warm the shared VehicleRatesVectorDB instance.
+    Should be called once at application startup.
     """
-    global _vehicle_rates_db_instance
-    if _vehicle_rates_db_instance is None:
-        # Fallback for scripts or tests that might not have called initialize
-        # But in production, initialize should be called explicitly
-        print("Warning: VehicleRatesVectorDB lazy initialization triggered.")
-        initialize_vehicle_rates_db()
-        
-    return _vehicle_rates_db_instance
+    get_vehicle_rates_db(db_folder)
 
 
 def test_mercedes():
@@ -1,17 +1,70 @@
 import os
+import numpy as np
 import pandas as pd
 import chromadb
 import shutil
 import time
 import ast
 import re
+import threading
+import logging
+import orjson
+from functools import cached_property
 from chromadb.utils import embedding_functions
+from app.services.vector_databases.vehicle_vector_utils import (
+    TOKEN_FIELDS, add_deduplicated, candidate_tokens, jaccard_scores, token_string, tokenize_model
+)
 
-# Define "junk" words that don't help identify a model
-MODEL_STOP_WORDS = {
-    'class', 'series', 'sedan', 'suv', 'coupe', 'ev', 'hybrid', 
-    'benz', 'na', 'n', 'a' # 'na', 'n', 'a' handle 'N/A' after tokenizing
+logger = logging.getLogger(__name__)
+
+# A flat {...} vehicle dict embedded in a free-text query
+_BRACE_RE = re.compile(r"\{[^{}]*\}")
+
+# HNSW settings for a stable corpus of tens of thousands of 384-dim vectors:
+# a denser graph built once, and a bounded search beam at query time.
+# Chroma 1.x takes these through the collection configuration; "hnsw:*" metadata is not applied.
+HNSW_CONFIGURATION = {
+    "max_neighbors": 32,
+    "ef_construction": 200,
+    "ef_search": 64,
+    "sync_threshold": 1_000,
+}
+# Used only while bulk indexing: inserts are buffered and added to the graph in large
+# batches, and the index is persisted once instead of every sync_threshold rows.
+INDEXING_HNSW_CONFIGURATION = {
+    "batch_size": 10_000,
+    "sync_threshold": 1_000_000,
 }
+# Restored once indexing ends (100 is Chroma's default batch_size)
+SERVING_HNSW_CONFIGURATION = {
+    "batch_size": 100,
+    "sync_threshold": HNSW_CONFIGURATION["sync_threshold"],
+}
+
+# Texts per ONNX inference call (Chroma's default is 32); index batches are 2000 documents
+EMBEDDING_BATCH_SIZE = 256
+
+class _BatchedONNXMiniLM(embedding_functions.ONNXMiniLM_L6_V2):
+    """Chroma's ONNX MiniLM with larger inference batches, so bulk indexing keeps the runtime busy."""
+    def _forward(self, documents, batch_size=EMBEDDING_BATCH_SIZE):
+        return super()._forward(documents, batch_size=batch_size)
+
+class _ONNXSentenceTransformer(embedding_functions.SentenceTransformerEmbeddingFunction):
+    """
+    The SentenceTransformer all-MiniLM-L6-v2 function vehicle_ratings_v1 was created with, run on ONNX.
+    name() and get_config() stay the SentenceTransformer ones, so Chroma accepts it for the stored
+    collection; texts are embedded by Chroma's ONNX Runtime build of the same weights instead of PyTorch.
+    """
+    def __init__(self, model_name="all-MiniLM-L6-v2"):
+        # super().__init__ is skipped on purpose: it would load the PyTorch model
+        self.model_name = model_name
+        self.device = "cpu"
+        self.normalize_embeddings = False
+        self.kwargs = {}
+        self._onnx = _BatchedONNXMiniLM(preferred_providers=["CPUExecutionProvider"])
+
+    def __call__(self, input):
+        return self._onnx(input)
 
 class VehicleVectorDB:
     def __init__(self, ratings_csv_path, db_folder="./vehicle_rates_rag", force_reindex=False):
@@ -30,24 +83,71 @@ class VehicleVectorDB:
         # 2. Connect to local persistent storage
         self.client = chromadb.PersistentClient(path=db_folder)
         
-        # 3. Define the embedding model
-        self.emb_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
-        )
+        # 3. The embedding model and collection are created on first use (see emb_fn / collection)
         
-        # 4. Get or Create the Collection
-        self.collection = self.client.get_or_create_collection(
-            name="vehicle_ratings_v1",
-            embedding_function=self.emb_fn
-        )
-        
-        # 5. Check if we need to index data
+        # 4. Check if we need to index data
         if self.collection.count() == 0:
             print("Database is empty. Indexing your CSV file now...")
-            self._index_data(ratings_csv_path)
+            self._set_hnsw_configuration(INDEXING_HNSW_CONFIGURATION)
+            try:
+                self._index_data(ratings_csv_path)
+            finally:
+                self._set_hnsw_configuration(SERVING_HNSW_CONFIGURATION)
         else:
             print(f"Database loaded! Contains {self.collection.count()} vehicles.")
 
+    @cached_property
+    def emb_fn(self):
+        """
+        The embedding model, built on first use.
+        Registered with Chroma as the collection's original SentenceTransformer function,
+        but served through ONNX Runtime; the ONNX session is only loaded when the first text is embedded.
+        """
+        return _ONNXSentenceTransformer(model_name="all-MiniLM-L6-v2")
+
+    @cached_property
+    def collection(self):
+        """Get or Create the Collection on first use."""
+        return self.client.get_or_create_collection(
+            name="vehicle_ratings_v1",
+            embedding_function=self.emb_fn,
+            configuration={"hnsw": HNSW_CONFIGURATION}
+        )
+
+    def _set_hnsw_configuration(self, hnsw):
+        """Switches the collection's mutable HNSW settings (bulk-load vs. serving)."""
+        try:
+            self.collection.modify(configuration={"hnsw": hnsw})
+        except Exception:
+            logger.error(f"Could not update HNSW settings to {hnsw}", exc_info=True)
+            raise
+        logger.info(f"HNSW settings updated: {hnsw}")
+
+    # Shared instances by absolute db_folder (see get)
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, ratings_csv_path, db_folder="./vehicle_rates_rag"):
+        """
+        Returns the shared instance for db_folder, creating it on first use.
+        Opening the PersistentClient and loading the embedding model happen once per process.
+        ratings_csv_path is only read when the folder's collection is still empty.
+        """
+        return cls._shared(os.path.abspath(db_folder), ratings_csv_path)
+
+    @classmethod
+    def _shared(cls, db_path, ratings_csv_path):
+        """Instance for an absolute db_path; equivalent spellings of a folder share one client."""
+        instance = cls._instances.get(db_path)
+        if instance is None:
+            with cls._instances_lock:
+                instance = cls._instances.get(db_path)
+                if instance is None:
+                    instance = cls(ratings_csv_path, db_folder=db_path, force_reindex=False)
+                    cls._instances[db_path] = instance
+        return instance
+
     def _index_data(self, csv_path):
         """
         Reads the CSV and saves to ChromaDB in BATCHES to avoid memory errors.
@@ -57,38 +157,30 @@ class VehicleVectorDB:
 
         df = pd.read_csv(csv_path)
         
-        documents = []
-        metadatas = []
-        ids = []
-        
         print(f"Preparing {len(df)} rows for indexing...")
         
-        for idx, row in df.iterrows():
-            # Helper to safely get string values
-            def clean(val): return str(val).strip() if pd.notna(val) else "N/A"
-
-            # Create semantic string
-            semantic_text = (
-                f"{row['year']} {clean(row['make'])} {clean(row['model'])} {clean(row.get('series'))} {clean(row.get('package'))} {clean(row['style'])}. "
-                f"Engine: {clean(row.get('engine'))}. "
-                f"Ratings - GRG: {row['grg']}, DRG: {row['drg']}."
-            )
-            
-            documents.append(semantic_text)
-            
-            # Store Metadata
-            # Using .get() for safety if columns are missing in CSV
-            metadatas.append({
-                "year": int(row['year']),
-                "make": clean(row['make']),
-                "model": clean(row['model']),
-                "series": clean(row.get('series')),
-                "package": clean(row.get('package')),
-                "style": clean(row['style']),
-                "engine": clean(row.get('engine')),
-                "grg": int(row['grg'])
-            })
-            ids.append(str(idx))
+        # Vectorized clean(): stripped string, or "N/A" if missing (columns absent from the CSV are all "N/A")
+        for col in ('make', 'model', 'series', 'package', 'style', 'engine'):
+            values = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+            df[col] = values.astype(str).str.strip().where(values.notna(), "N/A")
+
+        # Create semantic strings
+        documents = (
+            df['year'].astype(str) + ' ' + df['make'] + ' ' + df['model'] + ' ' + df['series'] + ' '
+            + df['package'] + ' ' + df['style'] + '. Engine: ' + df['engine'] + '. '
+            + 'Ratings - GRG: ' + df['grg'].astype(str) + ', DRG: ' + df['drg'].astype(str) + '.'
+        ).tolist()
+        
+        # Store Metadata: whole-column int casts instead of per-row int()
+        for col in ('year', 'grg'):
+            df[col] = df[col].astype(np.int32)
+        for field in TOKEN_FIELDS:
+            df[f"{field}_tokens"] = df[field].map(token_string)
+        metadatas = df[
+            ['year', 'make', 'model', 'series', 'package', 'style', 'engine', 'grg']
+            + [f"{field}_tokens" for field in TOKEN_FIELDS]
+        ].to_dict(orient='records')
+        ids = df.index.astype(str).tolist()
             
         # Batch Insertion
         BATCH_SIZE = 2000
@@ -98,29 +190,20 @@ class VehicleVectorDB:
         
         for i in range(0, total_docs, BATCH_SIZE):
             end_idx = min(i + BATCH_SIZE, total_docs)
-            self.collection.add(
-                documents=documents[i:end_idx],
-                metadatas=metadatas[i:end_idx],
-                ids=ids[i:end_idx]
+            add_deduplicated(
+                self.collection,
+                documents[i:end_idx],
+                metadatas[i:end_idx],
+                ids[i:end_idx],
+                embedding_function=self.emb_fn
             )
             print(f"  - Indexed {end_idx}/{total_docs}")
             
         print("Indexing Complete.")
 
     def _tokenize_model(self, model_name):
-        """
-        Helper to robustly tokenize model/trim names and remove stop words.
-        Splits letters from numbers (e.g., 'EQB300' -> 'eqb 300').
-        """
-        # Insert space between letters and numbers
-        s = re.sub(r'([a-zA-Z])([0-9])', r'\1 \2', model_name)
-        s = re.sub(r'([0-9])([a-zA-Z])', r'\1 \2', s)
-        
-        # Replace hyphens/slashes with spaces, strip non-alphanumeric, lowercase
-        tokens = re.sub(r'[^a-z0-9\s]+', '', s.lower().replace('-', ' '))
-        
-        # Split by space, filter out empty tokens and stop words
-        return set(filter(lambda t: t and t not in MODEL_STOP_WORDS, tokens.split()))
+        """Tokenizes a model/trim name (see vehicle_vector_utils.tokenize_model, which is cached)."""
+        return tokenize_model(model_name)
 
     def _jaccard_similarity(self, set_a, set_b):
         """Calculates Jaccard similarity between two sets."""
@@ -135,65 +218,133 @@ class VehicleVectorDB:
              
         return len(intersection) / len(union)
 
-    def search_with_boosting(self, query_text, boost_targets, weights, top_k=5):
+    def search_with_boosting(self, query_text, boost_targets, weights, top_k=5, return_type='dict'):
         """
         Performs Vector Search + Jaccard Similarity Boosting (Re-ranking).
         Now boosts: Make, Model, Year, Trim (combined series/package)
+        return_type: 'dict' for a list of hit dicts, 'df' for a DataFrame.
         """
-        # 1. Fetch Wide (Top 50)
+        # Embedded once, shared by the filtered query and the unfiltered fallback
+        query_embeddings = self.emb_fn([query_text])
+
+        # 1. Narrow the ANN search to the target's make/year neighbourhood when known
+        where = self._build_where(boost_targets)
+        if where is not None:
+            results = self.collection.query(
+                query_embeddings=query_embeddings,
+                where=where,
+                n_results=max(25, top_k)
+            )
+            if results['ids'] and len(results['ids'][0]) >= top_k:
+                hits = self._rerank(
+                    results['documents'][0],
+                    results['metadatas'][0],
+                    results['distances'][0],
+                    boost_targets,
+                    weights,
+                    top_k
+                )
+                return self._as_return_type(hits, return_type)
+            # Fewer than top_k rows matched the filter (e.g. a make spelled differently); search unfiltered
+
+        return self.search_batch(
+            [query_text], [boost_targets], weights, top_k, return_type,
+            query_embeddings=query_embeddings
+        )[0]
+
+    def _build_where(self, boost_targets):
+        """
+        Builds a Chroma metadata filter from the boost targets:
+        year within +/- 2 of the target and an exact make match
+        (compared as given: _index_data stores make exactly as it appears in the CSV).
+        Returns None when there is nothing to filter on.
+        """
+        where_clauses = []
+
+        target_year = int(boost_targets.get('year') or 0)
+        if target_year > 0:
+            where_clauses.append({'year': {'$gte': target_year - 2}})
+            where_clauses.append({'year': {'$lte': target_year + 2}})
+
+        target_make = str(boost_targets.get('make') or '').strip()
+        if target_make:
+            where_clauses.append({'make': {'$eq': target_make}})
+
+        if not where_clauses:
+            return None
+        if len(where_clauses) == 1:
+            return where_clauses[0]
+        return {'$and': where_clauses}
+
+    def search_batch(self, queries, boost_targets_list, weights, top_k=5, return_type='dict', query_embeddings=None):
+        """
+        Boosted search for several queries with a single collection.query call,
+        so the embeddings and HNSW lookups run as one batch.
+        query_embeddings: the queries' embeddings when the caller already has them.
+        Returns one result per query, in order (hit dicts, or DataFrames for return_type='df').
+        """
+        if not queries:
+            return []
+
+        # 1. Fetch Wide (Top 50 per query)
+        if query_embeddings is None:
+            query_embeddings = self.emb_fn(list(queries))
         results = self.collection.query(
-            query_texts=[query_text],
-            n_results=50 
+            query_embeddings=query_embeddings,
+            n_results=max(50, top_k)
         )
-        
+
+        return [
+            self._as_return_type(
+                self._rerank(
+                    results['documents'][q],
+                    results['metadatas'][q],
+                    results['distances'][q],
+                    boost_targets_list[q],
+                    weights,
+                    top_k
+                ),
+                return_type
+            )
+            for q in range(len(queries))
+        ]
+
+    def _rerank(self, documents, metadatas, distances, boost_targets, weights, top_k):
+        """Applies the Jaccard/year boosts to one query's candidates and returns the top_k hit dicts."""
         reranked_candidates = []
         
         # 2. Apply Boosts
-        if results['ids'] and len(results['ids']) > 0:
-            # Pre-tokenize targets once
-            target_make_tokens = self._tokenize_model(boost_targets.get('make', ''))
-            target_model_tokens = self._tokenize_model(boost_targets.get('model', ''))
+        if metadatas:
+            new_scores = np.asarray(distances, dtype=float)
+
+            # A/B. Make & Model Boost (Proportional Jaccard Similarity, all candidates at once)
+            for field in ('make', 'model'):
+                target_tokens = self._tokenize_model(boost_targets.get(field, ''))
+                field_tokens = [candidate_tokens(meta, field) for meta in metadatas]
+                new_scores -= weights.get(field, 0.0) * jaccard_scores(target_tokens, field_tokens)
+
+            # C. Year Boost
+            target_year = int(boost_targets.get('year', 0))
+            if target_year > 0:
+                candidate_years = np.array([int(meta.get('year', 0)) for meta in metadatas])
+                year_gap = np.abs(candidate_years - target_year)
+                # Apply partial boost for "near" years
+                new_scores -= np.where(year_gap == 0, weights.get('year', 0.0),
+                                       np.where(year_gap <= 2, weights.get('year', 0.0) / 2, 0.0))
+
+            # D. Trim Boost (Proportional Jaccard Similarity)
+            # This logic combines the db's series and package to match the user's trim
             target_trim_tokens = self._tokenize_model(boost_targets.get('trim', ''))
-            
-            for i in range(len(results['ids'][0])):
-                meta = results['metadatas'][0][i]
-                original_dist = results['distances'][0][i]
-                
-                new_score = original_dist
-                
-                # A. Make Boost (Proportional Jaccard Similarity)
-                candidate_make_tokens = self._tokenize_model(meta.get('make', ''))
-                jaccard_score_make = self._jaccard_similarity(target_make_tokens, candidate_make_tokens)
-                new_score -= (weights.get('make', 0.0) * jaccard_score_make)
-                    
-                # B. Model Boost (Proportional Jaccard Similarity)
-                candidate_model_tokens = self._tokenize_model(meta.get('model', ''))
-                jaccard_score_model = self._jaccard_similarity(target_model_tokens, candidate_model_tokens)
-                new_score -= (weights.get('model', 0.0) * jaccard_score_model)
-
-                # C. Year Boost
-                target_year = int(boost_targets.get('year', 0))
-                candidate_year = int(meta.get('year', 0))
-                if target_year > 0:
-                    if candidate_year == target_year:
-                        new_score -= weights.get('year', 0.0)
-                    elif abs(candidate_year - target_year) <= 2:
-                        # Apply partial boost for "near" years
-                        new_score -= (weights.get('year', 0.0) / 2)
-
-                # D. Trim Boost (Proportional Jaccard Similarity)
-                # This logic combines the db's series and package to match the user's trim
-                candidate_series = meta.get('series', '')
-                candidate_package = meta.get('package', '')
-                candidate_full_trim = f"{candidate_series} {candidate_package}"
-                
-                candidate_trim_tokens = self._tokenize_model(candidate_full_trim)
-                
-                jaccard_score_trim = self._jaccard_similarity(target_trim_tokens, candidate_trim_tokens)
-                new_score -= (weights.get('trim', 0.0) * jaccard_score_trim)
+            # (the tokens of "series package" are the union of each part's tokens)
+            candidate_trim_tokens = [
+                candidate_tokens(meta, 'series') | candidate_tokens(meta, 'package')
+                for meta in metadatas
+            ]
+            new_scores -= weights.get('trim', 0.0) * jaccard_scores(target_trim_tokens, candidate_trim_tokens)
 
+            for i, meta in enumerate(metadatas):
                 reranked_candidates.append({
-                    "Vehicle Info": results['documents'][0][i],
+                    "Vehicle Info": documents[i],
                     "year": meta.get('year'),
                     "make": meta.get('make'),
                     "model": meta.get('model'),
@@ -201,7 +352,7 @@ class VehicleVectorDB:
                     "package": meta.get('package', 'N/A'),
                     "style": meta.get('style', 'N/A'),
                     "engine": meta.get('engine', 'N/A'),
-                    "Match Distance": round(new_score, 4)  # Boosted Score
+                    "Match Distance": round(float(new_scores[i]), 4)  # Boosted Score
                 })
         
         # 3. Sort & Slice
@@ -222,41 +373,26 @@ class VehicleVectorDB:
                 "Match Distance": item['Match Distance']
             })
             
-        return pd.DataFrame(formatted_hits)
+        return formatted_hits
 
-    def search_by_text(self, query_text, top_k=5, boost_weights=None):
+    def search_by_text(self, query_text, top_k=5, boost_weights=None, return_type='dict'):
         """
         Standard semantic search. 
         Detects if the query string contains boosting instructions and a JSON dict.
         Can also accept an external boost_weights dictionary.
+        Callers that already hold the vehicle dict should use search_structured.
+        return_type: 'dict' for a list of hit dicts, 'df' for a DataFrame.
         """
         # Check for boosting instruction
         if "should be boosted" in query_text:
             try:
                 # Attempt to find a dictionary-like structure { ... }
-                match = re.search(r"\{.*\}", query_text)
+                match = _BRACE_RE.search(query_text)
                 if match:
-                    dict_str = match.group(0)
-                    vehicle_dict = ast.literal_eval(dict_str)
-                    
-                    # Map dictionary keys to our database metadata fields
-                    boost_targets = {}
-                    # Handle common keys from user input
-                    if 'modelYear' in vehicle_dict: boost_targets['year'] = int(vehicle_dict['modelYear'])
-                    if 'year' in vehicle_dict: boost_targets['year'] = int(vehicle_dict['year'])
-                    if 'make' in vehicle_dict: boost_targets['make'] = vehicle_dict['make']
-                    if 'model' in vehicle_dict: boost_targets['model'] = vehicle_dict['model']
-                    
-                    # Updated mapping: 'trim' from dict maps to 'trim' for boosting
-                    if 'trim' in vehicle_dict: boost_targets['trim'] = vehicle_dict['trim']
-                    elif 'bodyType' in vehicle_dict: boost_targets['trim'] = vehicle_dict['bodyType'] # Fallback
-                    
-                    # Define weights for boosting
+                    vehicle_dict = self._parse_vehicle_dict(match.group(0))
                     # Use provided weights or default (now includes trim)
                     weights = boost_weights if boost_weights is not None else {'make': 0.5, 'model': 0.3, 'year': 0.1, 'trim': 0.2}
-                    
-                    print(f"\n[Boosting] Detected targets: {boost_targets} with weights: {weights}")
-                    return self.search_with_boosting(query_text, boost_targets, weights, top_k)
+                    return self.search_structured(query_text, vehicle_dict, weights, top_k, return_type)
             except Exception as e:
                 print(f"[Warning] Boosting parsing failed: {e}. Proceeding with standard search.")
 
@@ -265,9 +401,42 @@ class VehicleVectorDB:
             query_texts=[query_text],
             n_results=top_k
         )
-        return self._format_results(results)
+        return self._as_return_type(self._format_results_raw(results), return_type)
+
+    def _parse_vehicle_dict(self, dict_str):
+        """Parses an embedded vehicle dict: JSON first, Python-literal syntax (single quotes, None) as fallback."""
+        try:
+            return orjson.loads(dict_str)
+        except orjson.JSONDecodeError:
+            return ast.literal_eval(dict_str)
 
-    def search_by_vin_data(self, vin_data, boosting=True, boost_weights=None):
+    def search_structured(self, query_text, vehicle_dict, boost_weights=None, top_k=5, return_type='dict'):
+        """
+        Boosted search for callers that already have the vehicle as a dict,
+        skipping the regex/parse step of search_by_text.
+        """
+        # Map dictionary keys to our database metadata fields
+        boost_targets = {}
+        # Handle common keys from user input
+        if 'modelYear' in vehicle_dict: boost_targets['year'] = int(vehicle_dict['modelYear'])
+        if 'year' in vehicle_dict:
+            year_str = str(vehicle_dict['year'])
+            boost_targets['year'] = int(year_str) if year_str.isdigit() else 0
+        if 'make' in vehicle_dict: boost_targets['make'] = vehicle_dict['make']
+        if 'model' in vehicle_dict: boost_targets['model'] = vehicle_dict['model']
+        
+        # Updated mapping: 'trim' from dict maps to 'trim' for boosting
+        if 'trim' in vehicle_dict: boost_targets['trim'] = vehicle_dict['trim']
+        elif 'bodyType' in vehicle_dict: boost_targets['trim'] = vehicle_dict['bodyType'] # Fallback
+        
+        # Define weights for boosting
+        # Use provided weights or default (now includes trim)
+        weights = boost_weights if boost_weights is not None else {'make': 0.5, 'model': 0.3, 'year': 0.1, 'trim': 0.2}
+        
+        print(f"\n[Boosting] Detected targets: {boost_targets} with weights: {weights}")
+        return self.search_with_boosting(query_text, boost_targets, weights, top_k, return_type)
+
+    def search_by_vin_data(self, vin_data, boosting=True, boost_weights=None, return_type='dict'):
         """
         Searches the DB based on a VIN data dictionary.
         
@@ -275,6 +444,7 @@ class VehicleVectorDB:
             vin_data (dict): A dictionary containing vehicle specs.
             boosting (bool): Whether to apply boosting logic.
             boost_weights (dict): A dictionary of {field: factor} to control boosting.
+            return_type (str): 'dict' for a list of hit dicts, 'df' for a DataFrame.
         """
         
         # 1. Extract specs from dictionary
@@ -290,19 +460,17 @@ class VehicleVectorDB:
         
         # 3. Set up boosting
         if boosting:
-            # Define Boost Targets
-            boost_targets = {
-                'year': int(year_str) if year_str.isdigit() else 0,
-                'make': make,
-                'model': model,
-                'trim': trim # Map 'trim' from vin_data to 'trim' for boosting
-            }
-            
             # Define Weights: Use provided or default (now includes trim)
             weights = boost_weights if boost_weights is not None else {'make': 0.5, 'model': 0.3, 'year': 0.15, 'trim': 0.2}
             
             print(f"\nUsing Search Query: '{query}' (with boosting: {weights})")
-            return self.search_with_boosting(query, boost_targets, weights)
+            # Boost targets: year, make, model and trim straight from vin_data
+            return self.search_structured(
+                query,
+                {'year': year_str, 'make': make, 'model': model, 'trim': trim},
+                weights,
+                return_type=return_type
+            )
         else:
             # Run a standard, non-boosted search
             print(f"\nUsing Search Query: '{query}' (boosting disabled)")
@@ -310,9 +478,10 @@ class VehicleVectorDB:
                 query_texts=[query],
                 n_results=5
             )
-            return self._format_results(results)
+            return self._as_return_type(self._format_results_raw(results), return_type)
 
-    def _format_results(self, results):
+    def _format_results_raw(self, results):
+        """Chroma query results as a list of hit dicts."""
         hits = []
         if results['ids'] and len(results['ids']) > 0:
             for i in range(len(results['ids'][0])):
@@ -328,7 +497,11 @@ class VehicleVectorDB:
                     "engine": meta.get('engine', 'N/A'), 
                     "Match Distance": round(results['distances'][0][i], 4)
                 })
-        return pd.DataFrame(hits)
+        return hits
+
+    def _as_return_type(self, hits, return_type):
+        """Hit dicts as-is for return_type='dict', or as a DataFrame for 'df'."""
+        return pd.DataFrame(hits) if return_type == 'df' else hits
 
 # --- EXECUTION ---
 
@@ -343,7 +516,7 @@ MERCEDES_EQB_2023 = {'make': 'MERCEDES-BENZ',
 
 if __name__ == "__main__":
     # 1. Initialize
-    app = VehicleVectorDB("/Users/zubeydeyararbas/ml/insurance-quotes/Data/California/STATEFARM_CA_Insurance__tables/car_factors/auto_ratings_2024_2001.csv")
+    app = VehicleVectorDB.get("/Users/zubeydeyararbas/ml/insurance-quotes/Data/California/STATEFARM_CA_Insurance__tables/car_factors/auto_ratings_2024_2001.csv")
     fields = ['MAKE', 'MODEL', 'SERIES','OPTIONPACKAGE', 'BODYSTYLE','MATCH DISTANCE','YEAR'] 
     scoring_recommendations = " Match with Year Make Model should be boosted when scoring"
 
@@ -351,7 +524,7 @@ if __name__ == "__main__":
     print("\n--- Test 1: User Question ---")
     question = "Find me a safe hybrid Audi sedan"
     print(f"Asking: '{question}'...")
-    print(app.search_by_text(question)[fields])
+    print(app.search_by_text(question, return_type='df')[fields])
 
     # 3. Test: Search by JSON (Text Search with Custom Boosting)
     vehicle = { "make": "MERCEDES BENZ",
@@ -370,11 +543,11 @@ if __name__ == "__main__":
     print(f"\n--- Test 2: Search by JSON (Text Search with Custom Boosting) ---")
     print(f"Asking: '{question}'...")
     print(f"Using custom weights: {custom_weights_text}")
-    print(app.search_by_text(question, boost_weights=custom_weights_text)[fields])
+    print(app.search_by_text(question, boost_weights=custom_weights_text, return_type='df')[fields])
     
     # 4. Test: Search by VIN Data (Default Boosting)
     print("\n--- Test 3: VIN Data Match Mercedes EQB-Class (Default Boosting) ---")
-    results2 = app.search_by_vin_data(MERCEDES_EQB_2023, boosting=True)
+    results2 = app.search_by_vin_data(MERCEDES_EQB_2023, boosting=True, return_type='df')
     if not results2.empty:
         print(results2[fields])
     else:
@@ -385,7 +558,7 @@ if __name__ == "__main__":
     # This is the test case from your prompt, now using 'trim'
     custom_weights_vin = {'year': 0.7, 'make': 0.6, 'model': 0.5,  'series': 0.4, 'trim': 0.3}
     print(f"Using custom weights: {custom_weights_vin}")
-    results3 = app.search_by_vin_data(MERCEDES_EQB_2023, boosting=True, boost_weights=custom_weights_vin)
+    results3 = app.search_by_vin_data(MERCEDES_EQB_2023, boosting=True, boost_weights=custom_weights_vin, return_type='df')
     if not results3.empty:
         print(results3[fields])
     else:
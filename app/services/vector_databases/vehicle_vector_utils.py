@@ -0,0 +1,188 @@
+"""
+Vehicle Vector Utilities
+
+Tokenizer, token metadata, Jaccard scoring, deduplicated indexing and the batched
+SentenceTransformer embedding function shared by the vehicle vector stores (VehicleVectorDB, VehicleRatesVectorDB) and the loaders that
+index into them. The "<field>_tokens" metadata written at index time and the target
+tokens built at query time both come from tokenize_model here, so the two cannot
+drift apart.
+"""
+
+import re
+import sys
+import threading
+from functools import lru_cache
+
+import numpy as np
+from chromadb.utils import embedding_functions
+
+# Define "junk" words that don't help identify a model
+MODEL_STOP_WORDS = frozenset({
+    'class', 'series', 'sedan', 'suv', 'coupe', 'ev', 'hybrid',
+    'benz', 'na', 'n', 'a' # 'na', 'n', 'a' handle 'N/A' after tokenizing
+})
+
+class BatchedSentenceTransformer(embedding_functions.SentenceTransformerEmbeddingFunction):
+    """
+    Chroma's SentenceTransformer embedding function, encoding in batch_size batches
+    (Chroma's own uses encode's default of 32). name() and get_config() are unchanged.
+    """
+    def __init__(self, model_name="all-MiniLM-L6-v2", device="cpu", normalize_embeddings=False,
+                 batch_size=32, **kwargs):
+        super().__init__(model_name=model_name, device=device, normalize_embeddings=normalize_embeddings, **kwargs)
+        self.batch_size = batch_size
+
+    def __call__(self, input):
+        embeddings = self._model.encode(
+            list(input),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+            normalize_embeddings=self.normalize_embeddings
+        )
+        return [np.array(embedding, dtype=np.float32) for embedding in embeddings]
+
+
+# Metadata fields whose token sets are stored at index time as "<field>_tokens"
+TOKEN_FIELDS = ('make', 'model', 'series', 'package', 'style', 'engine')
+
+_RE_LN = re.compile(r'([a-zA-Z])([0-9])')
+_RE_NL = re.compile(r'([0-9])([a-zA-Z])')
+_RE_CLEAN = re.compile(r'[^a-z0-9\s]+')
+
+
+@lru_cache(maxsize=200_000)
+def tokenize_model(model_name):
+    """
+    Helper to robustly tokenize model/trim names and remove stop words.
+    Splits letters from numbers (e.g., 'EQB300' -> 'eqb 300').
+    Memoized: candidate make/model/trim strings repeat heavily across queries. Returns a frozenset.
+    """
+    s = str(model_name) # Handle potential int/digits
+    # Insert space between letters and numbers
+    s = _RE_LN.sub(r'\1 \2', s)
+    s = _RE_NL.sub(r'\1 \2', s)
+
+    # Replace hyphens/slashes with spaces, strip non-alphanumeric, lowercase
+    tokens = _RE_CLEAN.sub('', s.lower().replace('-', ' '))
+
+    # Split by space, filter out empty tokens and stop words
+    return frozenset(t for t in tokens.split() if t and t not in MODEL_STOP_WORDS)
+
+
+def token_string(value):
+    """Space-joined, sorted tokens of a metadata value, as stored in "<field>_tokens"."""
+    return " ".join(sorted(tokenize_model(value)))
+
+
+def candidate_tokens(meta, field):
+    """Token set of a candidate field, read from its precomputed "<field>_tokens" metadata when present."""
+    tokens = meta.get(f'{field}_tokens')
+    if tokens is None:
+        # Collections indexed before token metadata existed
+        return tokenize_model(meta.get(field, ''))
+    return frozenset(tokens.split())
+
+
+def add_token_columns(df):
+    """
+    Adds a "<field>_tokens" column for each of TOKEN_FIELDS to a loader's metadata frame, in place,
+    so reranking doesn't re-tokenize candidates at query time.
+    The fields become categoricals: repeated values (e.g. "MERCEDES-BENZ") share one interned str
+    in the metadata dicts, and each distinct value is tokenized once.
+    """
+    for field in TOKEN_FIELDS:
+        values = df[field].astype('category').cat.rename_categories(sys.intern)
+        df[field] = values
+        df[f'{field}_tokens'] = values.map(token_string)
+    return df
+
+
+def add_deduplicated(collection, documents, metadatas, ids, embedding_function=None):
+    """
+    collection.add that skips work already done:
+    rows whose id is already in the collection (or repeated within the batch) are not re-added,
+    and each distinct document is embedded once. Rows whose semantic text is identical
+    (differing only in metadata such as vsd/lrg/expiration) reuse that embedding;
+    every row is still stored with its own id and metadata.
+    embedding_function: the collection's embedding function; without it Chroma embeds every row itself.
+    """
+    existing = set(collection.get(ids=list(dict.fromkeys(ids)), include=[])['ids'])
+    keep = []
+    for position, row_id in enumerate(ids):
+        if row_id not in existing:
+            existing.add(row_id)
+            keep.append(position)
+    if not keep:
+        return
+    if len(keep) < len(ids):
+        documents = [documents[position] for position in keep]
+        metadatas = [metadatas[position] for position in keep]
+        ids = [ids[position] for position in keep]
+
+    unique_documents = list(dict.fromkeys(documents))
+    if embedding_function is None or len(unique_documents) == len(documents):
+        collection.add(documents=documents, metadatas=metadatas, ids=ids)
+        return
+
+    vectors = dict(zip(unique_documents, embedding_function(unique_documents)))
+    collection.add(
+        documents=documents,
+        embeddings=[vectors[doc] for doc in documents],
+        metadatas=metadatas,
+        ids=ids
+    )
+
+
+# Process-wide token -> bit position, assigned on first sight
+_TOKEN_BITS = {}
+_TOKEN_BITS_LOCK = threading.Lock()
+# Above this vocabulary size the masks get wide enough that plain set arithmetic is cheaper
+MAX_BITMASK_TOKENS = 10_000
+
+
+@lru_cache(maxsize=200_000)
+def _token_bits(tokens):
+    """Bit positions of a token set in the shared vocabulary."""
+    missing = [t for t in tokens if t not in _TOKEN_BITS]
+    if missing:
+        with _TOKEN_BITS_LOCK:
+            for t in missing:
+                _TOKEN_BITS.setdefault(t, len(_TOKEN_BITS))
+    return np.fromiter((_TOKEN_BITS[t] for t in tokens), dtype=np.int64, count=len(tokens))
+
+
+def _pack_bits(bit_lists, width):
+    """Packs each list of bit positions into one row of `width` uint64 words."""
+    masks = np.zeros((len(bit_lists), width), dtype=np.uint64)
+    lengths = [len(bits) for bits in bit_lists]
+    if sum(lengths):
+        bits = np.concatenate(bit_lists)
+        rows = np.repeat(np.arange(len(bit_lists)), lengths)
+        np.bitwise_or.at(masks, (rows, bits >> 6), np.left_shift(np.uint64(1), (bits & 63).astype(np.uint64)))
+    return masks
+
+
+def jaccard_scores(target_tokens, candidate_token_sets):
+    """
+    Jaccard similarity of one target token set against every candidate at once.
+    Each set is a uint64 bitmask over the shared vocabulary, so the
+    intersection/union sizes are popcounts of AND/OR across all candidates.
+    """
+    target_bits = _token_bits(target_tokens)
+    candidate_bits = [_token_bits(tokens) for tokens in candidate_token_sets]
+
+    vocab_size = len(_TOKEN_BITS)
+    if vocab_size > MAX_BITMASK_TOKENS:
+        return np.array([
+            len(target_tokens & tokens) / max(len(target_tokens | tokens), 1)
+            for tokens in candidate_token_sets
+        ])
+
+    width = vocab_size // 64 + 1
+    candidates = _pack_bits(candidate_bits, width)
+    target = _pack_bits([target_bits], width)[0]
+
+    intersection = np.bitwise_count(candidates & target).sum(axis=1)
+    union = np.bitwise_count(candidates | target).sum(axis=1)
+    return intersection / np.maximum(union, 1)
@@ -0,0 +1,133 @@
+"""
+AI Assistant Batcher
+
+Coalesces concurrent vehicle interpretation requests into a single AI call.
+
+Requests arriving within a short window (20 ms by default) are collected on an
+asyncio queue and sent to the AI service as one multi-vehicle prompt. Each
+caller blocks only on its own result, so the orchestrator keeps its synchronous
+API while bulk imports and retries share one round-trip.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (vin_data, search_results, additional_info, conversation_history)
+InterpretationCase = Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], str, Optional[List[Dict[str, str]]]]
+
+
+class AIAssistantBatcher:
+    """
+    Micro-batcher in front of an AI assistant service.
+
+    The service must provide interpret_vehicle_results_batch(cases), returning
+    one result dict per case in order. The batching loop runs on a daemon
+    thread that is started on first use. Callers wait at most timeout_seconds
+    for their result.
+    """
+
+    def __init__(self, ai_service, window_seconds: float = 0.02, max_batch_size: int = 8,
+                 timeout_seconds: float = 120.0):
+        self.ai_service = ai_service
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self.timeout_seconds = timeout_seconds
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._start_lock = threading.Lock()
+
+    def interpret_vehicle_results(
+        self,
+        vin_data: Optional[Dict[str, Any]],
+        search_results: List[Dict[str, Any]],
+        additional_info: str = "",
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Submit one case and block until its (possibly batched) result is ready.
+        Raises concurrent.futures.TimeoutError if no result arrives within timeout_seconds.
+        """
+        self._ensure_started()
+        case = (vin_data, search_results, additional_info, conversation_history)
+        pending = asyncio.run_coroutine_threadsafe(self._submit(case), self._loop)
+        try:
+            return pending.result(timeout=self.timeout_seconds)
+        except concurrent.futures.TimeoutError:
+            pending.cancel()
+            raise
+
+    def _ensure_started(self):
+        """Start the background event loop and batching worker once."""
+        if self._loop is not None:
+            return
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._queue = asyncio.Queue()
+                loop.create_task(self._worker())
+                ready.set()
+                loop.run_forever()
+
+            threading.Thread(target=run, name="ai-assistant-batcher", daemon=True).start()
+            ready.wait()
+            self._loop = loop
+            logger.info("AIAssistantBatcher started")
+
+    async def _submit(self, case: InterpretationCase) -> Dict[str, Any]:
+        future = self._loop.create_future()
+        await self._queue.put((case, future))
+        return await future
+
+    async def _worker(self):
+        """Collect cases until the window closes or the batch is full, then dispatch."""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.window_seconds
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Dispatch without awaiting so the next window can fill while the AI call runs
+            self._loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: List[Tuple[InterpretationCase, asyncio.Future]]):
+        cases = [case for case, _ in batch]
+        if len(cases) > 1:
+            logger.info(f"AIAssistantBatcher dispatching {len(cases)} cases in one AI call")
+        try:
+            results = await self._loop.run_in_executor(None, self.ai_service.interpret_vehicle_results_batch, cases)
+        except Exception as e:
+            logger.error(f"Batched AI interpretation failed: {e}", exc_info=True)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        results = list(results or [])
+        if len(results) != len(batch):
+            logger.error(f"Batched AI interpretation returned {len(results)} results for {len(batch)} cases")
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        # Cases the service returned no result for must not leave their callers waiting
+        for _, future in batch[len(results):]:
+            if not future.done():
+                future.set_exception(RuntimeError(
+                    f"AI service returned {len(results)} results for a batch of {len(batch)} cases"
+                ))
@@ -9,9 +9,10 @@ import requests
 import logging
 import json
 import statistics
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from collections import defaultdict
+from app.services.vehicle_search.vehicle_specification import specification_key
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -197,30 +198,13 @@ class AIAssistantService:
         
         return deduplicated_results, conflict_stats
     
-    def _group_by_specification(self, vehicles: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    def _group_by_specification(self, vehicles: List[Dict[str, Any]]) -> Dict[Tuple, List[Dict[str, Any]]]:
         """Group vehicles by their specification (excluding ratings)."""
         spec_groups = defaultdict(list)
-        
         for vehicle in vehicles:
-            spec_key = self._create_specification_key(vehicle)
-            spec_groups[spec_key].append(vehicle)
-        
+            spec_groups[specification_key(vehicle)].append(vehicle)
         return dict(spec_groups)
     
-    def _create_specification_key(self, vehicle: Dict[str, Any]) -> str:
-        """Create a unique key for vehicle specification (excluding ratings)."""
-        key_components = [
-            str(vehicle.get('year', '')),
-            str(vehicle.get('make', '')),
-            str(vehicle.get('model', '')),
-            str(vehicle.get('series', '')),
-            str(vehicle.get('package', '')),
-            str(vehicle.get('style', '')),
-            str(vehicle.get('engine', '')),
-            str(vehicle.get('wheelbase', ''))
-        ]
-        return '|'.join(key_components)
-    
     def _resolve_rating_conflicts(self, vehicles: List[Dict[str, Any]]) -> tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
         """Resolve rating conflicts for vehicles with identical specifications."""
         if not vehicles:
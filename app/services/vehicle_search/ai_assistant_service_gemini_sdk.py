@@ -1,5 +1,5 @@
 import logging
-import json
+import orjson
 import statistics
 import os
 import re
@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from collections import defaultdict
+from app.services.vehicle_search.vehicle_specification import specification_key
 
 # --- Import official Gemini SDK components ---
 try:
@@ -120,7 +121,49 @@ class AIAssistantServiceGeminiSDK:
                 'error': f"AI interpretation failed: {str(e)}",
                 'questions': ["Could you provide more details about the vehicle?", "What is the body style?", "What is the engine type?"]
             }
-    
+
+    def interpret_vehicle_results_batch(self, cases: List[Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], str, Optional[List[Dict[str, str]]]]]) -> List[Dict[str, Any]]:
+        """
+        Interpret several independent vehicle cases with a single AI call.
+
+        Each case is (vin_data, search_results, additional_info, conversation_history).
+        Returns one result per case, in order. Falls back to one call per case if
+        the combined response cannot be mapped back to the cases.
+        """
+        if len(cases) == 1:
+            return [self.interpret_vehicle_results(*cases[0])]
+
+        try:
+            case_prompts = []
+            case_stats = []
+            for vin_data, search_results, additional_info, conversation_history in cases:
+                deduplicated_results, conflict_stats = self._deduplicate_vehicle_specs(search_results)
+                context = self._prepare_context(vin_data, deduplicated_results, additional_info, conversation_history)
+                case_prompts.append(self._create_prompt(context))
+                case_stats.append(conflict_stats)
+
+            prompt = (
+                f"You will receive {len(cases)} independent cases, each with its own instructions and list of possible matches.\n"
+                f"Solve each case on its own and respond with a JSON array of exactly {len(cases)} objects, "
+                f"one per case in the same order, each in the JSON format described by its case.\n"
+            )
+            for i, case_prompt in enumerate(case_prompts, 1):
+                prompt += f"\n=== CASE {i} ===\n{case_prompt}"
+
+            results = self._parse_ai_batch_response(self._call_gemini_sdk(prompt), len(cases))
+            if results is None:
+                logging.warning("Batched AI response did not match the cases. Falling back to individual calls.")
+                return [self.interpret_vehicle_results(*case) for case in cases]
+
+            for result, conflict_stats in zip(results, case_stats):
+                if conflict_stats['conflict_groups'] > 0:
+                    result['deduplication_stats'] = conflict_stats
+            return results
+
+        except Exception as e:
+            logging.error(f"Error in batched AI interpretation: {e}. Falling back to individual calls.", exc_info=True)
+            return [self.interpret_vehicle_results(*case) for case in cases]
+
     def _call_gemini_sdk(self, prompt: str) -> str:
         """Call Google Gemini API using the google-genai SDK."""
         
@@ -174,23 +217,13 @@ class AIAssistantServiceGeminiSDK:
         
         return deduplicated_results, conflict_stats
     
-    def _group_by_specification(self, vehicles: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    def _group_by_specification(self, vehicles: List[Dict[str, Any]]) -> Dict[Tuple, List[Dict[str, Any]]]:
         """Group vehicles by their specification (excluding ratings)."""
         spec_groups = defaultdict(list)
         for vehicle in vehicles:
-            spec_key = self._create_specification_key(vehicle)
-            spec_groups[spec_key].append(vehicle)
+            spec_groups[specification_key(vehicle)].append(vehicle)
         return dict(spec_groups)
     
-    def _create_specification_key(self, vehicle: Dict[str, Any]) -> str:
-        """Create a unique key for vehicle specification (excluding ratings)."""
-        key_components = [
-            str(vehicle.get('year', '')), str(vehicle.get('make', '')), str(vehicle.get('model', '')),
-            str(vehicle.get('series', '')), str(vehicle.get('package', '')), str(vehicle.get('style', '')),
-            str(vehicle.get('engine', '')), str(vehicle.get('wheelbase', ''))
-        ]
-        return '|'.join(key_components)
-    
     # --- Remaining Deduplication and Helper Methods (omitted for brevity, assume they are carried over and correct) ---
     # _resolve_rating_conflicts, _resolve_rating_field_conflict, _calculate_max, 
     # _calculate_median, _calculate_mode, _determine_confidence_level, 
@@ -329,14 +362,28 @@ IMPORTANT: When returning a match, use this EXACT format:
         try:
             json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
             if json_match:
-                return json.loads(json_match.group())
+                return orjson.loads(json_match.group())
             else:
                 logging.warning("No JSON object found in AI response. Returning default questions.")
                 return {'questions': ['Could you provide more details about the vehicle?']}
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logging.error(f"Failed to parse AI response as JSON: {e}")
             return {'questions': ['Could you provide more details about the vehicle?']}
-    
+
+    def _parse_ai_batch_response(self, ai_response: str, expected_count: int) -> Optional[List[Dict[str, Any]]]:
+        """Parse a batched AI response into one dict per case, or None if it doesn't line up."""
+        try:
+            json_match = re.search(r'\[.*\]', ai_response, re.DOTALL)
+            if not json_match:
+                return None
+            results = orjson.loads(json_match.group())
+        except orjson.JSONDecodeError as e:
+            logging.error(f"Failed to parse batched AI response as JSON: {e}")
+            return None
+        if not isinstance(results, list) or len(results) != expected_count or not all(isinstance(r, dict) for r in results):
+            return None
+        return results
+
     def get_supported_providers(self) -> List[str]:
         """Get list of supported AI providers (only Gemini)."""
         return list(self.PROVIDERS.keys())
@@ -1,7 +1,7 @@
 import logging 
 import requests
 from typing import Dict, Any, List, Optional
-from app.services.lookup_services.vehicle_lookup_service import VehicleLookupService
+from app.services.lookup_services.vehicle_lookup_service import VehicleLookupService, canonical_vehicle_value
 from datetime import datetime
 import math
 
@@ -278,22 +278,22 @@ class VehicleSearchService:
         style: Optional[str] = None,
         engine: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Filter search results based on additional criteria."""
+        """Filter search results based on additional criteria (case-insensitive)."""
         filtered_results = []
         
         for vehicle in results:
             matches = True
             
-            if series and vehicle.get('series', '').upper() != series.upper():
+            if series and canonical_vehicle_value(vehicle.get('series')) != canonical_vehicle_value(series):
                 matches = False
             
-            if package and vehicle.get('package', '').upper() != package.upper():
+            if package and canonical_vehicle_value(vehicle.get('package')) != canonical_vehicle_value(package):
                 matches = False
             
-            if style and vehicle.get('style', '').upper() != style.upper():
+            if style and canonical_vehicle_value(vehicle.get('style')) != canonical_vehicle_value(style):
                 matches = False
             
-            if engine and vehicle.get('engine', '').upper() != engine.upper():
+            if engine and canonical_vehicle_value(vehicle.get('engine')) != canonical_vehicle_value(engine):
                 matches = False
             
             if matches:
@@ -11,14 +11,27 @@ This service provides a clean API for all vehicle specification use cases.
 """
 
 import logging
+import os
+import re
 from typing import Dict, Any, List, Optional
 import time
+import threading
+from functools import lru_cache
 from app.services.vehicle_search.vehicle_search_service import VehicleSearchService 
-from app.services.vehicle_search.ai_assistant_service_gemini_sdk import AIAssistantServiceGeminiSDK 
+from app.services.lookup_services.vehicle_lookup_service import canonical_vehicle_value
+from app.services.vehicle_search.ai_assistant_service_gemini_sdk import AIAssistantServiceGeminiSDK
+from app.services.vehicle_search.vehicle_specification import specification_key
+from app.services.vehicle_search.ai_assistant_batcher import AIAssistantBatcher
 # from app.services.vector_databases.vehicle_rates_search import get_vehicle_rates_db 
 from app.services.vector_databases.vehicle_rates_chroma import get_vehicle_rates_chromadb
 logger = logging.getLogger(__name__)
 
+# " - 2D CPE -" style segments, rewritten to "(2D CPE)" when normalizing vehicle strings
+_NORM_STYLE_RE = re.compile(r' - ([^-]+) -')
+
+# Whether responses carry the full step-by-step debug block unless the caller asks explicitly
+INCLUDE_STEP_DETAILS_DEFAULT = os.getenv("INCLUDE_VEHICLE_STEP_DETAILS", "false").lower() == "true"
+
 class VehicleSpecOrchestrator:
     """
     Lightweight orchestrator for vehicle specification services.
@@ -27,22 +40,35 @@ class VehicleSpecOrchestrator:
     for all vehicle specification use cases.
     """
     
+    # Fields understood by _matches_vehicle_components
+    _COMPONENT_KEYS = ('year', 'make', 'model', 'series', 'package', 'style')
+    
     def __init__(self):
         """Initialize the vehicle specification orchestrator."""
         self.search_service = VehicleSearchService()
         self.ai_service = AIAssistantServiceGeminiSDK()
+        # Coalesces concurrent AI interpretations into one Gemini call
+        self.ai_batcher = AIAssistantBatcher(self.ai_service)
         #self.vehicle_rates_vector_db = get_vehicle_rates_db()
         self.vehicle_rates_chromadb = get_vehicle_rates_chromadb()
         
         # Initialize services
         self._initialized = False
+        self._init_lock = threading.Lock()
+        
+        # Number of requests answered without an AI round-trip (single unambiguous vehicle)
+        self.ai_skip_total = 0
+        self._ai_skip_lock = threading.Lock()
     
     def initialize(self):
         """Initialize all underlying services."""
-        if not self._initialized:
-            self.search_service.initialize()
-            self._initialized = True
-            logger.info("VehicleSpecOrchestrator initialized")
+        if self._initialized:
+            return
+        with self._init_lock:
+            if not self._initialized:
+                self.search_service.initialize()
+                self._initialized = True
+                logger.info("VehicleSpecOrchestrator initialized")
     
     def process_vehicle_request(
         self,
@@ -51,7 +77,8 @@ class VehicleSpecOrchestrator:
         model: Optional[str] = None,
         year: Optional[int] = None,
         additional_info: Optional[str] = None,
-        conversation_history: Optional[List[Dict[str, str]]] = None
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        include_step_details: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         Process a complete vehicle specification request.
@@ -66,12 +93,16 @@ class VehicleSpecOrchestrator:
             year: Vehicle year (e.g., 2020)
             additional_info: Additional vehicle information (e.g., "Package: Convenience")
             conversation_history: Previous Q&A exchanges for context
+            include_step_details: Include the full step_details debug block
+                (defaults to the INCLUDE_VEHICLE_STEP_DETAILS env var)
             
         Returns:
             Dict containing the final vehicle specification or questions for clarification
         """
         try:
             start_time = time.time()
+            if include_step_details is None:
+                include_step_details = INCLUDE_STEP_DETAILS_DEFAULT
             if not self._initialized:
                 self.initialize()
             
@@ -104,22 +135,30 @@ class VehicleSpecOrchestrator:
             #     print(search_results)
             if not search_results:
                 result = self._process_results(
-                    vin_data, {"make": vin_data.get('make'),"model": vin_data.get('model'), "year": vin_data.get('year')}, search_results, {}, {}
+                    vin_data, {"make": vin_data.get('make'),"model": vin_data.get('model'), "year": vin_data.get('year')}, search_results, {}, {},
+                    include_step_details=include_step_details
                 )
                 return result 
             
             # Step 2: AI interpretation with deduplication
+            # Skipped when deduplication already leaves a single unambiguous vehicle
+            deduplicated_results = self._get_deduplicated_results(search_results)
             step_ai_start_time = time.time()
-            ai_result = self._perform_ai_interpretation(
-                vin_data, search_results, additional_info, conversation_history
-            )  
+            if len(deduplicated_results) == 1:
+                ai_result = self._build_single_match_result(search_results)
+            else:
+                ai_result = self._perform_ai_interpretation(
+                    vin_data, search_results, additional_info, conversation_history
+                )  
             step_ai_duration = time.time() - step_ai_start_time
             logger.info(f"TIMING ======= vehicle_spec_orchestrator _perform_ai_interpretation took {step_ai_duration:.4f} seconds")
             
             # Step 3: Process and format results
             step_process_start_time = time.time()
             result = self._process_results(
-                vin_data, search_result.get('search_criteria', {make: vin_data.get('make'), model: vin_data.get('model'), year: vin_data.get('year')}), search_results, ai_result, conversation_history
+                vin_data, search_result.get('search_criteria', {make: vin_data.get('make'), model: vin_data.get('model'), year: vin_data.get('year')}), search_results, ai_result, conversation_history,
+                deduplicated_results=deduplicated_results,
+                include_step_details=include_step_details
             )
             step_process_duration = time.time() - step_process_start_time
             logger.info(f"VehicleSpecOrchestrator.step_process took {step_process_duration:.4f} seconds")            
@@ -193,7 +232,7 @@ class VehicleSpecOrchestrator:
         logger.info(f"Conversation history length: {len(conversation_history) if conversation_history else 0}")
         logger.info(f"Additional info: {additional_info[:200]}..." if additional_info else "None")
         
-        ai_result = self.ai_service.interpret_vehicle_results(
+        ai_result = self.ai_batcher.interpret_vehicle_results(
             vin_data, search_results, additional_info, conversation_history
         )
         
@@ -204,30 +243,67 @@ class VehicleSpecOrchestrator:
         
         return ai_result
     
+    def _build_single_match_result(self, search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the AI result for a search that deduplicates to a single vehicle,
+        without calling the AI service. Rating conflicts are still resolved with
+        the AI service's conservative rules so the match matches the AI path.
+        """
+        deduplicated_results, conflict_stats = self.ai_service._deduplicate_vehicle_specs(search_results)
+        
+        ai_result = {
+            'match': deduplicated_results[0] if deduplicated_results else search_results[0],
+            'questions': []
+        }
+        if conflict_stats['conflict_groups'] > 0:
+            ai_result['deduplication_stats'] = conflict_stats
+        
+        # Routes share this orchestrator across threadpool workers, so the increment is guarded
+        with self._ai_skip_lock:
+            self.ai_skip_total += 1
+            ai_skip_total = self.ai_skip_total
+        logger.info(f"Single unambiguous vehicle, skipping AI interpretation (ai_skip_total={ai_skip_total})")
+        return ai_result
+    
     def _process_results(
         self,
         vin_data: Optional[Dict[str, Any]],
         search_criteria: Dict[str, Any],
         search_results: List[Dict[str, Any]],
         ai_result: Dict[str, Any],
-        conversation_history: Optional[List[Dict[str, str]]]
+        conversation_history: Optional[List[Dict[str, str]]],
+        deduplicated_results: Optional[List[Dict[str, Any]]] = None,
+        include_step_details: bool = True
     ) -> Dict[str, Any]:
-        """Process and format the final results with detailed step tracking."""
+        """
+        Process and format the final results with detailed step tracking.
+        
+        Without include_step_details only the resolved AI match (step 6) is
+        reported, since clients read the matched vehicle from it; the debug
+        steps and their helpers are skipped.
+        """
         result = {
             'status': 'success',
             'search_criteria': search_criteria,
             'total_matches': len(search_results),
             'ai_result': ai_result,
             'step_details': {
+                'step_6_lookup_results_from_ai': self._get_ai_match_results(ai_result, search_results)
+            }
+        }
+        
+        if include_step_details:
+            if deduplicated_results is None:
+                deduplicated_results = self._get_deduplicated_results(search_results)
+            result['step_details'] = {
                 'step_1_vin_lookup': vin_data if vin_data else None,
                 'step_2_initial_search_results': search_results,
-                'step_3_deduplicated_results': self._get_deduplicated_results(search_results),
+                'step_3_deduplicated_results': deduplicated_results,
                 'step_4_ai_service_results': ai_result,
                 'step_5_follow_up_questions': ai_result.get('questions', []) if ai_result else [],
-                'step_6_lookup_results_from_ai': self._get_ai_match_results(ai_result, search_results),
+                'step_6_lookup_results_from_ai': result['step_details']['step_6_lookup_results_from_ai'],
                 'step_7_conflict_resolution': self._get_conflict_resolution_details(ai_result)
             }
-        }
         
         # Add VIN data if available
         if vin_data:
@@ -244,120 +320,59 @@ class VehicleSpecOrchestrator:
         if not search_results:
             return []
         
-        # Group by specification (excluding ratings)
+        # Group by specification (excluding ratings); the first vehicle of each group represents it
         spec_groups = {}
         for vehicle in search_results:
-            spec_key = self._create_specification_key(vehicle)
-            if spec_key not in spec_groups:
-                spec_groups[spec_key] = []
-            spec_groups[spec_key].append(vehicle)
-        
-        # Return one representative from each group
-        deduplicated = []
-        for group in spec_groups.values():
-            if group:
-                # Use the first vehicle as representative
-                deduplicated.append(group[0])
-        
-        return deduplicated
-    
-    def _create_specification_key(self, vehicle: Dict[str, Any]) -> str:
-        """Create a unique key for vehicle specification (excluding ratings)."""
-        key_components = [
-            str(vehicle.get('year', '')),
-            str(vehicle.get('make', '')),
-            str(vehicle.get('model', '')),
-            str(vehicle.get('series', '')),
-            str(vehicle.get('package', '')),
-            str(vehicle.get('style', '')),
-            str(vehicle.get('engine', '')),
-            str(vehicle.get('wheelbase', ''))
-        ]
-        return '|'.join(key_components)
+            spec_groups.setdefault(specification_key(vehicle), vehicle)
+        
+        return list(spec_groups.values())
     
     def _get_ai_match_results(self, ai_result: Dict[str, Any], search_results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Get the specific vehicle match from AI results."""
-        logger.info(f"=== AI Match Results Debug ===")
-        logger.info(f"AI Result: {ai_result}")
-        logger.info(f"Search Results Count: {len(search_results) if search_results else 0}")
-        
         if not ai_result:
             logger.warning("No AI result provided")
             return None
-            
-        if not ai_result.get('match'):
-            logger.warning("No match in AI result")
-            return None
         
         match = ai_result.get('match')
-        logger.info(f"=== AI MATCH STRING ===")
-        logger.info(f"AI match: {match} (type: {type(match)})")
-        logger.info(f"=== END AI MATCH STRING ===")
-        
-        # If match is a string, try to find the corresponding vehicle
-        if isinstance(match, str):
-            logger.info(f"=== VEHICLE MATCHING PROCESS ===")
-            logger.info(f"AI match string: '{match}'")
-            logger.info(f"Searching through {len(search_results)} vehicles")
-            
-            # Show all available vehicles first
-            logger.info(f"=== AVAILABLE VEHICLES ===")
-            for i, vehicle in enumerate(search_results):
-                vehicle_str = self._create_vehicle_string(vehicle)
-                logger.info(f"Vehicle {i+1}: '{vehicle_str}'")
-                logger.info(f"  - Year: {vehicle.get('year')}")
-                logger.info(f"  - Make: {vehicle.get('make')}")
-                logger.info(f"  - Model: {vehicle.get('model')}")
-                logger.info(f"  - Series: {vehicle.get('series')}")
-                logger.info(f"  - Package: {vehicle.get('package')}")
-                logger.info(f"  - Style: {vehicle.get('style')}")
-            logger.info(f"=== END AVAILABLE VEHICLES ===")
-            
-            # Try exact match first
-            logger.info(f"=== EXACT MATCH ATTEMPT ===")
-            for i, vehicle in enumerate(search_results):
-                vehicle_str = self._create_vehicle_string(vehicle)
-                logger.info(f"Comparing: '{match}' == '{vehicle_str}'")
-                if vehicle_str == match:
-                    logger.info(f"✅ EXACT MATCH FOUND: Vehicle {i+1}")
-                    return vehicle
-            logger.info(f"❌ No exact match found")
-            
-            # Try flexible exact match (handle format differences)
-            logger.info(f"=== FLEXIBLE EXACT MATCH ATTEMPT ===")
-            for i, vehicle in enumerate(search_results):
-                vehicle_str = self._create_vehicle_string(vehicle)
-                # Normalize both strings for comparison
-                normalized_match = self._normalize_vehicle_string(match)
-                normalized_vehicle = self._normalize_vehicle_string(vehicle_str)
-                logger.info(f"Comparing normalized: '{normalized_match}' == '{normalized_vehicle}'")
-                if normalized_vehicle == normalized_match:
-                    logger.info(f"✅ FLEXIBLE EXACT MATCH FOUND: Vehicle {i+1}")
-                    return vehicle
-            logger.info(f"❌ No flexible exact match found")
-            
-            # Try partial matching with key components
-            logger.info(f"=== COMPONENT MATCH ATTEMPT ===")
-            match_components = self._parse_match_string(match)
-            logger.info(f"Parsed match components: {match_components}")
-            
-            for i, vehicle in enumerate(search_results):
-                if self._matches_vehicle_components(vehicle, match_components):
-                    logger.info(f"✅ COMPONENT MATCH FOUND: Vehicle {i+1}")
-                    return vehicle
-            logger.info(f"❌ No component match found")
-            
-            logger.warning(f"=== MATCHING FAILED ===")
-            logger.warning(f"Could not find match for: '{match}'")
-            logger.warning(f"Available vehicles: {[self._create_vehicle_string(v) for v in search_results[:5]]}")
-            return {'match_string': match, 'note': 'Could not find exact vehicle match', 'available_vehicles': [self._create_vehicle_string(v) for v in search_results[:5]]}
+        if not match:
+            logger.warning("No match in AI result")
+            return None
         
         # If match is already a vehicle object
-        logger.info(f"Match is already a vehicle object: {match}")
-        return match
+        if not isinstance(match, str):
+            return match
+        
+        logger.debug("matching %r against %d candidates", match, len(search_results))
+        vehicle_strings = [self._create_vehicle_string(vehicle) for vehicle in search_results]
+        
+        # Try exact match first
+        for i, vehicle_str in enumerate(vehicle_strings):
+            if vehicle_str == match:
+                logger.info(f"✅ EXACT MATCH FOUND: Vehicle {i+1}")
+                return search_results[i]
+        
+        # Try flexible exact match (handle format differences)
+        normalized_match = self._normalize_vehicle_string(match)
+        for i, vehicle_str in enumerate(vehicle_strings):
+            if self._normalize_vehicle_string(vehicle_str) == normalized_match:
+                logger.info(f"✅ FLEXIBLE EXACT MATCH FOUND: Vehicle {i+1}")
+                return search_results[i]
+        
+        # Try partial matching with key components
+        match_components = self._parse_match_string(match)
+        for i, vehicle in enumerate(search_results):
+            if self._matches_vehicle_components(vehicle, match_components):
+                logger.info(f"✅ COMPONENT MATCH FOUND: Vehicle {i+1}")
+                return vehicle
+        
+        logger.warning(f"Could not find match for: '{match}' (components: {match_components})")
+        return {'match_string': match, 'note': 'Could not find exact vehicle match', 'available_vehicles': vehicle_strings[:3]}
     
     def _create_vehicle_string(self, vehicle: Dict[str, Any]) -> str:
-        """Create a string representation of a vehicle for matching."""
+        """
+        Create a string representation of a vehicle for matching.
+        Callers build each candidate's string once and reuse the list across match passes.
+        """
         vehicle_str = f"{vehicle.get('year', '')} {vehicle.get('make', '')} {vehicle.get('model', '')}"
         if vehicle.get('series'):
             vehicle_str += f" {vehicle['series']}"
@@ -371,55 +386,53 @@ class VehicleSpecOrchestrator:
             vehicle_str += f" - WB: {vehicle['wheelbase']}"
         return vehicle_str
     
-    def _normalize_vehicle_string(self, vehicle_str: str) -> str:
-        """Normalize vehicle string for flexible matching."""
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _normalize_vehicle_string(vehicle_str: str) -> str:
+        """Normalize vehicle string for flexible matching (cached, pure)."""
         # Remove extra spaces and normalize format
         normalized = vehicle_str.strip()
         
         # Replace different style formats with consistent format
         # Handle both " - 2D CPE -" and "(2D CPE)" formats
-        import re
-        
-        # Replace dashes around style with parentheses
-        normalized = re.sub(r' - ([^-]+) -', r' (\1)', normalized)
+        normalized = _NORM_STYLE_RE.sub(r' (\1)', normalized)
         
         # Remove trailing dashes
-        normalized = re.sub(r' -+$', '', normalized)
+        normalized = normalized.rstrip(' -')
         
         # Normalize spaces
-        normalized = ' '.join(normalized.split())
-        
-        return normalized
+        return ' '.join(normalized.split())
     
-    def _parse_match_string(self, match_str: str) -> Dict[str, str]:
-        """Parse AI match string into components."""
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _parse_match_string(match_str: str) -> Dict[str, str]:
+        """
+        Parse AI match string into components.
+        Cached and shared between calls, so callers must not mutate the result.
+        """
         components = {}
         
         # Extract year, make, model from the beginning
         parts = match_str.split()
         if len(parts) >= 3:
             components['year'] = parts[0]
-            components['make'] = parts[1]
-            components['model'] = parts[2]
+            components['make'] = canonical_vehicle_value(parts[1])
+            components['model'] = canonical_vehicle_value(parts[2])
         
         
         
         return components
     
     def _matches_vehicle_components(self, vehicle: Dict[str, Any], match_components: Dict[str, str]) -> bool:
-        """Check if vehicle matches the parsed components."""
+        """
+        Check if vehicle matches the parsed components.
+        Parsed components are canonical; vehicle fields are canonicalized for the comparison.
+        """
         for key, value in match_components.items():
-            if key == 'year' and str(vehicle.get('year', '')) != value:
-                return False
-            elif key == 'make' and vehicle.get('make', '').upper() != value.upper():
-                return False
-            elif key == 'model' and vehicle.get('model', '').upper() != value.upper():
-                return False
-            elif key == 'series' and vehicle.get('series', '').upper() != value.upper():
-                return False
-            elif key == 'package' and vehicle.get('package', '').upper() != value.upper():
-                return False
-            elif key == 'style' and vehicle.get('style', '').upper() != value.upper():
+            if key == 'year':
+                if str(vehicle.get('year', '')) != value:
+                    return False
+            elif key in self._COMPONENT_KEYS and canonical_vehicle_value(vehicle.get(key)) != value:
                 return False
         return True
     
@@ -468,3 +481,14 @@ class VehicleSpecOrchestrator:
             'conflicts_resolved': enhanced_conflicts,
             'resolution_method': 'conservative_max'  # Based on our updated business rules
         }
+
+
+@lru_cache(maxsize=1)
+def get_orchestrator() -> VehicleSpecOrchestrator:
+    """
+    Get the shared, initialized VehicleSpecOrchestrator instance.
+    Called once at application startup so the first request doesn't pay for service setup.
+    """
+    orchestrator = VehicleSpecOrchestrator()
+    orchestrator.initialize()
+    return orchestrator
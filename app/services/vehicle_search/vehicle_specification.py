@@ -0,0 +1,26 @@
+"""
+Vehicle Specification Key
+
+The key that groups vehicle search results with identical specifications
+(ratings excluded). Shared by the AI assistant services' deduplication and the
+orchestrator, so both group results the same way.
+"""
+
+from operator import itemgetter
+from typing import Any, Dict, Tuple
+
+# Fields that identify a vehicle specification (ratings excluded); their values form the spec key
+SPECIFICATION_FIELDS = ('year', 'make', 'model', 'series', 'package', 'style', 'engine', 'wheelbase')
+_specification_getter = itemgetter(*SPECIFICATION_FIELDS)
+
+
+def specification_key(vehicle: Dict[str, Any]) -> Tuple[str, ...]:
+    """
+    Create a unique key for vehicle specification (excluding ratings): its SPECIFICATION_FIELDS as strings.
+    Values are str()-ed, so 2020 and '2020' fall in the same group; a missing field keys as ''.
+    """
+    try:
+        return tuple(map(str, _specification_getter(vehicle)))
+    except KeyError:
+        # Results without some spec fields (e.g. no 'package')
+        return tuple(str(vehicle.get(field, '')) for field in SPECIFICATION_FIELDS)
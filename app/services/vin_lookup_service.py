@@ -1,10 +1,15 @@
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 from typing import Dict, Any
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Shared keep-alive session: repeated VIN lookups reuse pooled TCP/TLS connections to vPIC
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
 class VinLookupService:
     """
     A service to look up vehicle information using a VIN from the NHTSA vPIC API.
@@ -35,7 +40,7 @@ class VinLookupService:
         endpoint_url = f"{self.BASE_URL}{vin}?format=json"
 
         try:
-            response = requests.get(endpoint_url, timeout=15)
+            response = SESSION.get(endpoint_url, timeout=15)
             response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
 
             return response.json()
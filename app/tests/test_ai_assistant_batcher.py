@@ -0,0 +1,106 @@
+import concurrent.futures
+import threading
+
+import pytest
+
+# Run from the project root: python -m pytest app/tests/test_ai_assistant_batcher.py
+
+from app.services.vehicle_search.ai_assistant_batcher import AIAssistantBatcher
+
+
+class FakeAIService:
+    """Records each batch call and answers every case with its VIN, optionally dropping or raising."""
+
+    def __init__(self, drop_last=False, error=None):
+        self.calls = []
+        self.drop_last = drop_last
+        self.error = error
+
+    def interpret_vehicle_results_batch(self, cases):
+        self.calls.append(cases)
+        if self.error is not None:
+            raise self.error
+        results = [{'match': vin_data['vin']} for vin_data, _, _, _ in cases]
+        return results[:-1] if self.drop_last else results
+
+
+def submit_concurrently(batcher, vins):
+    """Submit one case per VIN from its own thread at the same moment; returns a future per VIN."""
+    barrier = threading.Barrier(len(vins))
+
+    def submit(vin):
+        barrier.wait()
+        return batcher.interpret_vehicle_results({'vin': vin}, [])
+
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=len(vins))
+    futures = [pool.submit(submit, vin) for vin in vins]
+    pool.shutdown(wait=True)
+    return futures
+
+
+def test_coalesces_requests_within_window():
+    service = FakeAIService()
+    batcher = AIAssistantBatcher(service, window_seconds=0.5, max_batch_size=8)
+
+    futures = submit_concurrently(batcher, ['A', 'B', 'C'])
+
+    assert [f.result()['match'] for f in futures] == ['A', 'B', 'C']
+    assert len(service.calls) == 1
+    assert len(service.calls[0]) == 3
+
+
+def test_each_caller_gets_its_own_result_in_order():
+    service = FakeAIService()
+    batcher = AIAssistantBatcher(service, window_seconds=0.5, max_batch_size=8)
+    vins = [f'VIN{i}' for i in range(6)]
+
+    futures = submit_concurrently(batcher, vins)
+
+    # Results are handed out by position in the batch, whatever order the cases were queued in
+    assert len(service.calls) == 1
+    assert [f.result()['match'] for f in futures] == vins
+
+
+def test_service_exception_reaches_every_caller():
+    service = FakeAIService(error=ValueError('AI unavailable'))
+    batcher = AIAssistantBatcher(service, window_seconds=0.5, max_batch_size=8)
+
+    futures = submit_concurrently(batcher, ['A', 'B'])
+
+    for future in futures:
+        with pytest.raises(ValueError, match='AI unavailable'):
+            future.result()
+
+
+def test_short_result_list_fails_unmatched_callers():
+    service = FakeAIService(drop_last=True)
+    batcher = AIAssistantBatcher(service, window_seconds=0.5, max_batch_size=8)
+
+    futures = submit_concurrently(batcher, ['A', 'B'])
+
+    assert len(service.calls) == 1
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result()['match'])
+        except RuntimeError:
+            outcomes.append(None)
+    # The case the service answered gets its result; the other fails instead of hanging
+    first_vin = service.calls[0][0][0]['vin']
+    assert sorted(outcomes, key=lambda o: o is None) == [first_vin, None]
+
+
+def test_result_wait_times_out():
+    release = threading.Event()
+
+    class SlowService(FakeAIService):
+        def interpret_vehicle_results_batch(self, cases):
+            release.wait(5)
+            return super().interpret_vehicle_results_batch(cases)
+
+    batcher = AIAssistantBatcher(SlowService(), window_seconds=0.01, timeout_seconds=0.2)
+    try:
+        with pytest.raises(concurrent.futures.TimeoutError):
+            batcher.interpret_vehicle_results({'vin': 'A'}, [])
+    finally:
+        release.set()
@@ -1,9 +1,7 @@
 import sys
-import os
 from unittest.mock import MagicMock, patch
 
-# Add the project root to the python path
-sys.path.append(os.getcwd())
+# Run from the project root as a module: python -m app.tests.verify_refactor
 
 from app.routes.insurance_quotes import _calculate_single_rating, create_quote
 from app.models.models import RatingInput
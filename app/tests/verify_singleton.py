@@ -1,8 +1,6 @@
 import sys
-import os
 
-# Add current directory to path
-sys.path.append(os.getcwd())
+# Run from the project root as a module: python -m app.tests.verify_singleton
 
 from app.services.vector_databases.vehicle_rates_search import initialize_vehicle_rates_db, get_vehicle_rates_db, VehicleRatesVectorDB
 from app.services.vehicle_search.vehicle_spec_orchestrator import VehicleSpecOrchestrator
@@ -1,24 +1,96 @@
+import numpy as np
 import pandas as pd
 import os
-from functools import lru_cache
+from functools import wraps
 import logging
+import threading
+from typing import Any, Dict, List
 from app.services.storage_service import StorageService
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 VEHICLE_RATES = "vehicle-rates"
+# Column order of the vehicle lookup key (see DataLoader._create_vehicle_key)
+VEHICLE_KEY_COLUMNS = ('year', 'make', 'model', 'series', 'package', 'style', 'engine')
+# Tables looked up by exact index key; warmup() also keeps a {key: row} dict view of these
+EXACT_KEY_TABLES = (
+    'load_usage_type_factors', 'load_drg_deductible_factors', 'load_grg_deductible_factors',
+    'load_lrg_code_factors', 'load_good_driver_discount', 'load_good_student_discount',
+    'load_inexperienced_driver_education_discount', 'load_mature_driver_course_discount',
+    'load_multi_line_discount', 'load_student_away_discount', 'load_loyalty_discount',
+    'load_car_safety_rating_discount',
+)
+
+def _freeze_table(df: pd.DataFrame) -> pd.DataFrame:
+    """Marks the numeric column buffers of a cached table read-only so in-place edits fail loudly."""
+    for col in df.columns:
+        values = df[col].values
+        if isinstance(values, np.ndarray) and values.dtype != object:
+            values.setflags(write=False)
+            # .values is a view of the column's block; freeze the block itself too
+            if isinstance(values.base, np.ndarray):
+                values.base.setflags(write=False)
+    return df
+
+def cached_table(load_fn):
+    """
+    Memoizes a load_* method in DataLoader._tables; rating tables do not change at runtime.
+    The cached DataFrame is shared by every caller and is read-only: copy before modifying.
+    """
+    @wraps(load_fn)
+    def wrapper(self):
+        name = load_fn.__name__
+        table = self._tables.get(name)
+        if table is None:
+            # Services initialize in parallel: each table loads once under its own lock, so
+            # different tables load concurrently. Loaders built on other loaders take those tables' locks.
+            with self._table_lock(name):
+                table = self._tables.get(name)
+                if table is None:
+                    table = self._tables[name] = _freeze_table(load_fn(self))
+        return table
+    wrapper.cached_table = True
+    return wrapper
+
 class DataLoader:
     """
     Handles loading and caching of insurance rating tables from CSV files.
     Provides efficient access to data using pandas and in-memory caching.
     """
-    def __init__(self):
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> 'DataLoader':
+        """
+        Returns the shared loader (as StorageService): every lookup service shares one loader and its table cache.
+        The instance is published only once fully built, so a failed storage connection can be retried.
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls._create()
+        return cls._instance
+
+    @classmethod
+    def _create(cls) -> 'DataLoader':
+        self = super(DataLoader, cls).__new__(cls)
+        self._tables: Dict[str, pd.DataFrame] = {}
+        # Guards _table_locks; each table (and dict view) is loaded under its own lock from there
+        self._lock = threading.Lock()
+        self._table_locks: Dict[Any, threading.RLock] = {}
+        self.table_dicts: Dict[str, Dict[Any, Dict[str, Any]]] = {}
         # Assumes the 'Data' directory is at the app level.
         # self.base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'Data', 'California', 'STATEFARM_CA_Insurance__tables'))
         # logger.info(f"DataLoader initialized with base path: {self.base_path}")
-        self.storage_service = StorageService()
+        self.storage_service = StorageService.instance()
         # if not os.path.isdir(self.base_path):
         #     logger.warning(f"Data directory not found at expected path: {self.base_path}")
+        return self
+
+    def __new__(cls, *args, **kwargs):
+        # DataLoader() still works and returns the shared instance; prefer DataLoader.instance()
+        return cls.instance()
 
     # @lru_cache(maxsize=128)
     # def load_table(self, table_path: str) -> pd.DataFrame:
@@ -57,32 +129,45 @@ class DataLoader:
     #     # return self.load_territory_factors()
     #     return
 
+    @cached_table
     def load_vehicle_ratings(self) -> pd.DataFrame:
         """Loads vehicle ratings groups."""
         # df = self.load_table('car_factors/vehicle_ratings_groups - Sheet1.csv')
         try:
-            df = self.storage_service.get_collection_as_dataframe(VEHICLE_RATES)
+            df = self.storage_service.get_collection_as_dataframe(VEHICLE_RATES, projection={'_id': 0})
             # Standardize column names to lowercase
             df.columns = df.columns.str.lower()
 
-            # Create a standardized key for easy lookups, similar to the JS version
-            df['lookup_key'] = df.apply(
-                lambda row: self._create_vehicle_key(
-                    row['year'], row['make'], row['model'],
-                    row.get('series', ''), row.get('package', ''),
-                    row.get('style', ''), row.get('engine', '')
-                ),
-                axis=1
-            )
+            # Create a standardized key for easy lookups, similar to the JS version.
+            # Built column-wise; same result as _create_vehicle_key per row (missing/NaN parts are skipped).
+            lookup_key = pd.Series('', index=df.index)
+            for col in VEHICLE_KEY_COLUMNS:
+                if col in df.columns:
+                    lookup_key += df[col].astype(str).where(df[col].notna(), '')
+            df['lookup_key'] = lookup_key.str.upper().str.replace(' ', '', regex=False)
+            # Descriptive columns repeat heavily across trims; store them as categories (int codes + one copy per value)
+            for col in VEHICLE_KEY_COLUMNS[1:]:
+                if col in df.columns:
+                    df[col] = df[col].astype('category')
             return df.set_index('lookup_key')
         except Exception as e:
-            logging.error(f"Vehicle rates could not be loaded {e}")
+            logger.error("Vehicle rates could not be loaded %s", e)
             raise Exception(e)
         
-    def load_vehicle_ratings_groups(self) -> pd.DataFrame:
-        """Loads vehicle ratings groups (alias for load_vehicle_ratings)."""
-        return self.load_vehicle_ratings()
-
+    # Alias: the same memoized loader, so both names return the identical cached table
+    load_vehicle_ratings_groups = load_vehicle_ratings
+
+    def lookup_vehicles(self, lookup_keys: List[str]) -> pd.DataFrame:
+        """
+        Batch exact-key lookup of vehicle ratings (keys as built by _create_vehicle_key).
+        One hashed pass over the index instead of a .loc per vehicle; keys with no match are omitted.
+        """
+        ratings = self.load_vehicle_ratings()
+        # get_indexer_for also handles duplicate keys in the index
+        positions = ratings.index.get_indexer_for(lookup_keys)
+        return ratings.iloc[positions[positions >= 0]]
+
+    @cached_table
     def load_fallback_vehicle_ratings(self) -> pd.DataFrame:
         """Loads fallback vehicle ratings (by MSRP)."""
         data = [
@@ -119,10 +204,10 @@ class DataLoader:
         ]
         return pd.DataFrame(data)
 
-    def load_fallback_vehicle_rating_groups(self) -> pd.DataFrame:
-        """Loads fallback vehicle rating groups (alias for load_fallback_vehicle_ratings)."""
-        return self.load_fallback_vehicle_ratings()
+    # Alias: the same memoized loader, so both names return the identical cached table
+    load_fallback_vehicle_rating_groups = load_fallback_vehicle_ratings
         
+    @cached_table
     def load_model_year_factors(self) -> pd.DataFrame:
         """Loads model year factors."""
         data = [
@@ -154,6 +239,7 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df.set_index('min_year')
 
+    @cached_table
     def load_mileage_factors(self) -> pd.DataFrame:
         """Loads annual mileage factors."""
         data = [
@@ -188,6 +274,7 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df
 
+    @cached_table
     def load_usage_type_factors(self) -> pd.DataFrame:
         """Loads usage type factors."""
         data = [
@@ -198,6 +285,7 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df.set_index('automobile_use')
 
+    @cached_table
     def load_single_auto_factors(self) -> pd.DataFrame:
         """Loads single automobile factors."""
         data = [
@@ -209,9 +297,8 @@ class DataLoader:
         ]
         return pd.DataFrame(data)
 
-    def load_annual_mileage_factors(self) -> pd.DataFrame:
-        """Loads annual mileage factors (alias)."""
-        return self.load_mileage_factors()
+    # Alias: the same memoized loader, so both names return the identical cached table
+    load_annual_mileage_factors = load_mileage_factors
 
     def load_base_driver_factors(self) -> pd.DataFrame:
         """Loads State Farm specific base driver factors."""
@@ -248,6 +335,7 @@ class DataLoader:
         """Loads State Farm specific safety rating factors."""
         return self.load_table('driver_factors/driving_safety_record_rating_plan - Sheet1.csv')
 
+    @cached_table
     def load_bi_limits(self) -> pd.DataFrame:
         """Loads bodily injury limits and factors."""
         data = [
@@ -275,6 +363,7 @@ class DataLoader:
         ]
         return pd.DataFrame(data)
 
+    @cached_table
     def load_pd_limits(self) -> pd.DataFrame:
         """Loads property damage limits and factors."""
         data = [
@@ -293,6 +382,7 @@ class DataLoader:
         ]
         return pd.DataFrame(data)
 
+    @cached_table
     def load_um_limits(self) -> pd.DataFrame:
         """Loads uninsured motorist limits and factors."""
         data = [
@@ -306,6 +396,7 @@ class DataLoader:
         ]
         return pd.DataFrame(data)
 
+    @cached_table
     def load_mpc_limits(self) -> pd.DataFrame:
         """Loads medical payments coverage limits and factors."""
         data = [
@@ -321,6 +412,7 @@ class DataLoader:
         ]
         return pd.DataFrame(data)
 
+    @cached_table
     def load_drg_deductible_factors(self) -> pd.DataFrame:
         """Loads collision deductible factors by DRG."""
         data = [
@@ -363,6 +455,7 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df.set_index('DRG')
 
+    @cached_table
     def load_grg_deductible_factors(self) -> pd.DataFrame:
         """Loads comprehensive deductible factors by GRG."""
         data = [
@@ -405,6 +498,7 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df.set_index('GRG')
 
+    @cached_table
     def load_good_driver_discount(self) -> pd.DataFrame:
         """Loads good driver discount factors."""
         data = [
@@ -414,6 +508,7 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df.set_index('eligible')
 
+    @cached_table
     def load_good_student_discount(self) -> pd.DataFrame:
         """Loads good student discount factors."""
         data = [
@@ -423,6 +518,7 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df.set_index('eligible')
 
+    @cached_table
     def load_inexperienced_driver_education_discount(self) -> pd.DataFrame:
         """Loads inexperienced driver safety education discount factors."""
         data = [
@@ -435,6 +531,7 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df.set_index('coverage')
 
+    @cached_table
     def load_mature_driver_course_discount(self) -> pd.DataFrame:
         """Loads mature driver improvement course discount factors."""
         data = [
@@ -444,6 +541,7 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df.set_index('eligible')
 
+    @cached_table
     def load_multi_line_discount(self) -> pd.DataFrame:
         """Loads multiple line discount factors."""
         data = [
@@ -456,6 +554,7 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df.set_index('lookup_value')
 
+    @cached_table
     def load_loyalty_discount_factors(self) -> pd.DataFrame:
         """Loads loyalty discount factors by year and coverage."""
         data = [
@@ -467,6 +566,7 @@ class DataLoader:
         ]
         return pd.DataFrame(data)
 
+    @cached_table
     def load_student_away_discount(self) -> pd.DataFrame:
         """Loads student away at school discount factors."""
         data = [
@@ -479,11 +579,13 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df.set_index('coverage')
 
+    @cached_table
     def load_loyalty_discount(self) -> pd.DataFrame:
         """Loads loyalty discount by years of coverage."""
         df = self.load_loyalty_discount_factors()
         return df.set_index('tenure_years')
 
+    @cached_table
     def load_car_safety_rating_discount(self) -> pd.DataFrame:
         """Loads car safety rating discount factors."""
         data = [
@@ -496,6 +598,7 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df.set_index('Safety Code')
 
+    @cached_table
     def load_lrg_code_factors(self) -> pd.DataFrame:
         """Loads LRG code factors."""
         data = [
@@ -512,6 +615,7 @@ class DataLoader:
         df = pd.DataFrame(data)
         return df.set_index('lrg')
 
+    @cached_table
     def load_transportation_network_factors(self) -> pd.DataFrame:
         """Loads transportation network company factors."""
         data = [
@@ -523,6 +627,7 @@ class DataLoader:
         ]
         return pd.DataFrame(data)
 
+    @cached_table
     def load_transportation_friends_factors(self) -> pd.DataFrame:
         """Loads transportation of friends/occupation factors."""
         data = [
@@ -531,6 +636,7 @@ class DataLoader:
         ]
         return pd.DataFrame(data)
 
+    @cached_table
     def load_federal_employee_factors(self) -> pd.DataFrame:
         """Loads federal employee discount factors."""
         data = [
@@ -539,8 +645,90 @@ class DataLoader:
         ]
         return pd.DataFrame(data)
 
+    def _table_lock(self, key) -> threading.RLock:
+        """The load lock for one table (or table view), created on first use."""
+        lock = self._table_locks.get(key)
+        if lock is None:
+            with self._lock:
+                lock = self._table_locks.setdefault(key, threading.RLock())
+        return lock
+
+    def _table_dict(self, loader_name: str) -> Dict[Any, Dict[str, Any]]:
+        """Memoized {index key: row dict} view of an exact-key table; plain dict hits avoid a .loc per lookup."""
+        table_dict = self.table_dicts.get(loader_name)
+        if table_dict is None:
+            with self._table_lock(('dict', loader_name)):
+                table_dict = self.table_dicts.get(loader_name)
+                if table_dict is None:
+                    table_dict = self.table_dicts[loader_name] = getattr(self, loader_name)().to_dict(orient='index')
+        return table_dict
+
+    def load_drg_deductible_factors_dict(self) -> Dict[Any, Dict[str, Any]]:
+        """Collision deductible factors as {DRG: row}."""
+        return self._table_dict('load_drg_deductible_factors')
+
+    def load_grg_deductible_factors_dict(self) -> Dict[Any, Dict[str, Any]]:
+        """Comprehensive deductible factors as {GRG: row}."""
+        return self._table_dict('load_grg_deductible_factors')
+
+    def load_lrg_code_factors_dict(self) -> Dict[Any, Dict[str, Any]]:
+        """LRG code factors as {LRG code: row}."""
+        return self._table_dict('load_lrg_code_factors')
+
+    def load_good_driver_discount_dict(self) -> Dict[Any, Dict[str, Any]]:
+        """Good driver discount as {eligibility: row}."""
+        return self._table_dict('load_good_driver_discount')
+
+    def load_good_student_discount_dict(self) -> Dict[Any, Dict[str, Any]]:
+        """Good student discount as {eligibility: row}."""
+        return self._table_dict('load_good_student_discount')
+
+    def load_inexperienced_driver_education_discount_dict(self) -> Dict[Any, Dict[str, Any]]:
+        """Inexperienced driver education discount as {coverage: row}."""
+        return self._table_dict('load_inexperienced_driver_education_discount')
+
+    def load_mature_driver_course_discount_dict(self) -> Dict[Any, Dict[str, Any]]:
+        """Mature driver course discount as {eligibility: row}."""
+        return self._table_dict('load_mature_driver_course_discount')
+
+    def load_multi_line_discount_dict(self) -> Dict[Any, Dict[str, Any]]:
+        """Multi-line discount as {lookup value: row}."""
+        return self._table_dict('load_multi_line_discount')
+
+    def load_student_away_discount_dict(self) -> Dict[Any, Dict[str, Any]]:
+        """Student away discount as {coverage: row}."""
+        return self._table_dict('load_student_away_discount')
+
+    def load_loyalty_discount_dict(self) -> Dict[Any, Dict[str, Any]]:
+        """Loyalty discount as {tenure: row}."""
+        return self._table_dict('load_loyalty_discount')
+
+    def load_car_safety_rating_discount_dict(self) -> Dict[Any, Dict[str, Any]]:
+        """Car safety rating discount as {safety code: row}."""
+        return self._table_dict('load_car_safety_rating_discount')
+
+    def warmup(self) -> 'DataLoader':
+        """
+        Eagerly loads every cached table so the first quote does not pay the load cost,
+        and builds dict views of the exact-key tables (see EXACT_KEY_TABLES).
+        """
+        for name in dir(self):
+            loader = getattr(self, name)
+            # Skip non-table attributes and aliases (their __name__ is the canonical loader's)
+            if not getattr(loader, 'cached_table', False) or loader.__name__ != name:
+                continue
+            try:
+                df = loader()
+            except Exception as e:
+                logger.warning("Warmup could not load %s: %s", name, e)
+                continue
+            if name in EXACT_KEY_TABLES:
+                self._table_dict(name)
+        logger.info("DataLoader warmed up %d tables", len(self._tables))
+        return self
+
     def _create_vehicle_key(self, year, make, model, series='', package_='', style='', engine='') -> str:
-        """Creates a standardized vehicle key for lookups."""
+        """Creates a standardized vehicle key for a single lookup (load_vehicle_ratings builds keys column-wise)."""
         # Ensure all parts are strings before concatenating
         parts = [str(p) for p in [year, make, model, series, package_, style, engine] if pd.notna(p)]
         return "".join(parts).upper().replace(' ', '')
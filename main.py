@@ -1,9 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from app.routes import health, insurance_quotes
 # from app.services.vector_databases.vehicle_rates_search import initialize_vehicle_rates_db
 from app.services.vector_databases.vehicle_rates_chroma import initialize_vehicle_rates_chromadb   
+from app.services.vehicle_search.vehicle_spec_orchestrator import get_orchestrator
+from app.utils.data_loader import DataLoader
 
 
 @asynccontextmanager
@@ -11,6 +14,8 @@ async def lifespan(app: FastAPI):
     # Startup: Initialize the singleton
     # initialize_vehicle_rates_db()
     initialize_vehicle_rates_chromadb()
+    get_orchestrator()
+    DataLoader().warmup()
     yield
     # Shutdown: Clean up if necessary (nothing to do for now)
 
@@ -18,7 +23,8 @@ app = FastAPI(
     title="Insurance Quotes API",
     description="Provides insurance quotes for a given insurance policy information for a given insurance carriers",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 # Configure CORS
 origins = [